@@ -18,6 +18,38 @@ def parse_args() -> argparse.Namespace:
         action='store_true',
         help='Enable debugging mode.',
     )
+    parser.add_argument(
+        '--interpret',
+        action='store_true',
+        help='Interpret instructions one by one instead of translating them.',
+    )
+    parser.add_argument(
+        '--precise',
+        action='store_true',
+        help='Emulate peripherals before every memory access (slower).',
+    )
+    parser.add_argument(
+        '--no-idle-skip',
+        action='store_true',
+        help=(
+            'Run busy-wait loops instead of skipping them (only translated '
+            'loops are skipped).'
+        ),
+    )
+    parser.add_argument(
+        '--renderer',
+        choices=['fifo', 'scanline', 'numpy'],
+        default='fifo',
+        help=(
+            'Render pixel by pixel (fifo) or line by line (scanline, or '
+            'numpy which requires NumPy).'
+        ),
+    )
+    parser.add_argument(
+        '--profile-bus',
+        action='store_true',
+        help='Count the memory accesses and report them on exit (slower).',
+    )
 
     return parser.parse_args()
 
@@ -31,12 +63,24 @@ def setup_debugging(enabled: bool, gameboy: GameBoy):
 
 def main():
     args = parse_args()
-    with GameBoy(
-        gamerom=args.gamerom,
-    ) as gameboy:
+    try:
+        gameboy = GameBoy(
+            gamerom=args.gamerom,
+            translate=not args.interpret,
+            precise=args.precise,
+            skip_idle=not args.no_idle_skip,
+            renderer=args.renderer,
+        )
+    except ImportError as error:  # e.g. NumPy for `--renderer numpy`
+        raise SystemExit(f'gameboy: error: {error}')
+    with gameboy:
         setup_debugging(enabled=args.debug, gameboy=gameboy)
+        if args.profile_bus:
+            gameboy.motherboard.bus.start_profiling()
         while gameboy.tick():
             pass
+        if args.profile_bus:
+            print(gameboy.motherboard.bus.stop_profiling().report())
 
 
 main()
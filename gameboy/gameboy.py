@@ -8,12 +8,23 @@ from gameboy.plugin import Plugins
 
 class GameBoy:
 
-    def __init__(self, gamerom: str):
+    def __init__(
+        self,
+        gamerom: str,
+        translate: bool = True,
+        precise: bool = False,
+        skip_idle: bool = True,
+        renderer: str = 'fifo',
+    ):
         self.paused = False
         self.running = True
 
         self.motherboard = Motherboard(
             gamerom=gamerom,
+            translate=translate,
+            precise=precise,
+            skip_idle=skip_idle,
+            renderer=renderer,
         )
 
         self.event_queue: List[Event] = []
@@ -49,3 +60,4 @@ class GameBoy:
 
     def __exit__(self, exc_type, exc_value, exc_traceback):
         self.running = False
+        self.motherboard.close()
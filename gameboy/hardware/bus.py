@@ -1,6 +1,9 @@
-from typing import TYPE_CHECKING
+from typing import (
+    TYPE_CHECKING, Callable, Dict, List, Optional, Tuple, Union,
+)
 
 from gameboy.common import UnexpectedFallThrough
+from gameboy.hardware.profiler import SAMPLE_INTERVAL, BusProfiler
 
 if TYPE_CHECKING:
     from gameboy.hardware.motherboard import Motherboard
@@ -22,6 +25,49 @@ if TYPE_CHECKING:
 '''
 
 
+"""
+Accesses are dispatched by a table of the 256 pages of the address space.
+Pages of plain memory map to a writable (or read-only) view of the backing
+buffer, the other pages map to a method handling the region. The tables are
+only updated when the mapping changes.
+
+Blocks of memory are read and written page by page: the pages of plain
+memory are copied by slices, only the others go through their handlers one
+byte at a time.
+
+While the PPU reads VRAM (mode 3), the pages of VRAM map to a handler which
+returns 0xFF instead, see `block_vram`. OAM is handled by methods anyway.
+
+Watched pages map to a handler which calls the watches after the access, so
+that the other pages keep their plain mapping. Likewise, all pages map to
+counting handlers only while profiling.
+"""
+
+# reads of unmapped memory
+ZERO_PAGE = memoryview(bytes(0x100))
+
+# called with the address, the value, the PC and the ticks
+WatchCallback = Callable[[int, int, Optional[int], int], None]
+
+
+class Watch:
+
+    def __init__(
+        self,
+        first: int,
+        last: int,
+        on_read: Optional[WatchCallback] = None,
+        on_write: Optional[WatchCallback] = None,
+    ):
+        self.first = first
+        self.last = last
+        self.on_read = on_read
+        self.on_write = on_write
+
+    def covers(self, page: int) -> bool:
+        return self.first >> 8 <= page <= self.last >> 8
+
+
 class Bus:
 
     def __init__(
@@ -33,25 +79,371 @@ class Bus:
         self.ram = motherboard.ram
         self.io = motherboard.io
         self.ppu = motherboard.ppu
+        # pages of RAM holding translated code, see `Translator`
+        self.code_pages = bytearray(0x100)
+
+        self.read_pages: List[Optional[memoryview]] = [None] * 0x100
+        self.read_handlers: List[Callable[[int], int]] = [
+            self.read_unmapped,
+        ] * 0x100
+        self.write_pages: List[Optional[memoryview]] = [None] * 0x100
+        self.write_handlers: List[Callable[[int, int], None]] = [
+            self.write_unmapped,
+        ] * 0x100
+        # views of the pages of the cartridge banks by window
+        self.bank_pages: Dict[int, List[Optional[memoryview]]] = {}
+        self.watches: List[Watch] = []
+        # the PC of the instruction accessing the bus while there are watches,
+        # None for the other accesses, see `watch`
+        self.instruction_pc: Optional[int] = None
+        # reads of the instrumented pages without instrumentation, see `peek`
+        self.plain_reads: Dict[
+            int, Tuple[Optional[memoryview], Callable[[int], int]],
+        ] = {}
+        self.profiler: Optional[BusProfiler] = None
+        self.vram_blocked = False
+        self.vram_pages = [
+            self.view(self.ppu.vram, offset << 8) for offset in range(0x20)
+        ]
+        self.remap()
 
     def read(self, address: int) -> int:
-        if 0x0 <= address <= 0x7FFF:  # Cartridge ROM
-            return self.cartridge.read(address=address)
-        elif 0x8000 <= address <= 0x9FFF:  # Tile Data
-            return self.ppu.read(address=address)
-        elif 0xA000 <= address <= 0xBFFF:  # Cartridge RAM
-            return self.cartridge.read(address=address)
-        elif 0xC000 <= address <= 0xDFFF:  # Working RAM
-            return self.ram.read(address=address)
-        elif 0xE000 <= address <= 0xFDFF:  # Echo RAM
-            return 0
-        elif 0xFE00 <= address <= 0xFE9F:  # OAM
-            if self.io.dma.active:
+        page = self.read_pages[address >> 8]
+        if page is not None:
+            return page[address & 0xFF]
+        return self.read_handlers[address >> 8](address)
+
+    def write(self, address: int, value: int) -> None:
+        page = self.write_pages[address >> 8]
+        if page is not None:
+            page[address & 0xFF] = value
+            return
+        return self.write_handlers[address >> 8](address, value)
+
+    def read_block(self, address: int, length: int) -> bytes:
+        """Reads `length` bytes from `address` (wrapping around)."""
+        chunks: List[Union[bytes, memoryview]] = []
+        while length > 0:
+            offset = address & 0xFF
+            count = min(length, 0x100 - offset)
+            page = self.read_pages[address >> 8]
+            if page is not None:
+                chunks.append(page[offset:offset + count])
+            else:
+                read = self.read
+                chunks.append(bytes(
+                    read(address + index) for index in range(count)
+                ))
+            address = (address + count) & 0xFFFF
+            length -= count
+        return b''.join(chunks)
+
+    def write_block(self, address: int, data: bytes) -> None:
+        """Writes `data` to `address` (wrapping around)."""
+        data = memoryview(data).cast('B')
+        start = 0
+        while start < len(data):
+            offset = address & 0xFF
+            count = min(len(data) - start, 0x100 - offset)
+            page = self.write_pages[address >> 8]
+            if page is not None:
+                page[offset:offset + count] = data[start:start + count]
+            else:
+                # a handler may map the page, e.g. by dropping its code
+                for index in range(count):
+                    self.write(address + index, data[start + index])
+            address = (address + count) & 0xFFFF
+            start += count
+
+    def peek(self, address: int) -> int:
+        """Reads `address` without calling the watches or counting it."""
+        plain = self.plain_reads.get(address >> 8)
+        if plain is None:
+            return self.read(address)
+        page, handler = plain
+        if page is not None:
+            return page[address & 0xFF]
+        return handler(address)
+
+    def watch(
+        self,
+        first: int,
+        last: Optional[int] = None,
+        on_read: Optional[WatchCallback] = None,
+        on_write: Optional[WatchCallback] = None,
+    ) -> Watch:
+        """
+        Calls `on_read` after every read and `on_write` after every write of
+        the addresses from `first` to `last` (or only `first`). The PC is the
+        address of the instruction, the CPU interprets the code while there
+        are watches. It is None for the accesses which are not made by an
+        instruction, e.g. pushing the PC for an interrupt or OAM DMA.
+        """
+        watch = Watch(
+            first=first, last=first if last is None else last,
+            on_read=on_read, on_write=on_write,
+        )
+        self.watches.append(watch)
+        self.remap(first=watch.first >> 8, last=watch.last >> 8)
+        return watch
+
+    def unwatch(self, watch: Watch) -> None:
+        self.watches.remove(watch)
+        self.remap(first=watch.first >> 8, last=watch.last >> 8)
+
+    def start_profiling(self, interval: int = SAMPLE_INTERVAL) -> BusProfiler:
+        """Counts the accesses until `stop_profiling`."""
+        self.profiler = BusProfiler(interval=interval)
+        self.remap()
+        return self.profiler
+
+    def stop_profiling(self) -> Optional[BusProfiler]:
+        profiler, self.profiler = self.profiler, None
+        self.remap()
+        return profiler
+
+    def remap(self, first: int = 0x00, last: int = 0xFF) -> None:
+        """Updates the tables of the pages from `first` to `last`."""
+        for page in range(first, last + 1):
+            self.map_page(page=page)
+
+    def map_page(self, page: int) -> None:
+        read_page: Optional[memoryview] = None
+        write_page: Optional[memoryview] = None
+        read_handler: Callable[[int], int] = self.read_unmapped
+        write_handler: Callable[[int, int], None] = self.write_unmapped
+        if 0x00 <= page <= 0x3F:  # Cartridge ROM Bank 0
+            read_page = self.pages(self.cartridge.rom_window0, 0x40)[page]
+            read_handler = self.cartridge.read
+            write_handler = self.write_mbc
+        elif 0x40 <= page <= 0x7F:  # Cartridge ROM Bank 1 - Switchable
+            read_page = self.pages(self.cartridge.rom_window, 0x40)[
+                page - 0x40
+            ]
+            read_handler = self.cartridge.read
+            write_handler = self.write_mbc
+        elif 0x80 <= page <= 0x9F:  # Tile Data
+            if not self.vram_blocked:
+                read_page = self.vram_pages[page - 0x80]
+            read_handler = self.read_vram
+            write_handler = self.write_vram
+        elif 0xA0 <= page <= 0xBF:  # Cartridge RAM
+            read_page = self.pages(self.cartridge.ram_window, 0x20)[
+                page - 0xA0
+            ]
+            if self.cartridge.save is None:
+                write_page = read_page
+            read_handler = self.cartridge.read
+            write_handler = self.cartridge.write
+        elif 0xC0 <= page <= 0xDF:  # Working RAM
+            read_page = self.view(self.ram.wram, (page - 0xC0) << 8)
+            if self.code_pages[page]:
+                write_handler = self.write_code
+            else:
+                write_page = read_page
+        elif 0xE0 <= page <= 0xFD:  # Echo RAM
+            read_page = ZERO_PAGE
+            write_handler = self.write_ignored
+        elif page == 0xFE:  # OAM
+            read_handler = self.read_oam
+            write_handler = self.write_oam
+        elif page == 0xFF:  # I/O Ports, High RAM and IE
+            read_handler = self.read_high
+            write_handler = self.write_high
+        self.plain_reads.pop(page, None)
+        watches = [watch for watch in self.watches if watch.covers(page)]
+        if self.profiler is not None or any(
+            watch.on_read for watch in watches
+        ):
+            self.plain_reads[page] = (read_page, read_handler)
+        if any(watch.on_read for watch in watches):
+            read_handler = self.watched_read(
+                page=read_page, handler=read_handler, watches=watches,
+            )
+            read_page = None
+        if any(watch.on_write for watch in watches):
+            write_handler = self.watched_write(
+                page=write_page, handler=write_handler, watches=watches,
+            )
+            write_page = None
+        if self.profiler is not None:
+            read_handler = self.profiler.counted_read(
+                index=page, page=read_page, handler=read_handler,
+            )
+            write_handler = self.profiler.counted_write(
+                index=page, page=write_page, handler=write_handler,
+            )
+            read_page = write_page = None
+        self.read_pages[page] = read_page
+        self.read_handlers[page] = read_handler
+        self.write_pages[page] = write_page
+        self.write_handlers[page] = write_handler
+
+    def watched_read(
+        self,
+        page: Optional[memoryview],
+        handler: Callable[[int], int],
+        watches: List[Watch],
+    ) -> Callable[[int], int]:
+        callbacks = [
+            (watch.first, watch.last, watch.on_read) for watch in watches
+            if watch.on_read is not None
+        ]
+        motherboard = self.motherboard
+
+        def read(address: int) -> int:
+            if page is not None:
+                value = page[address & 0xFF]
+            else:
+                value = handler(address)
+            for first, last, on_read in callbacks:
+                if first <= address <= last:
+                    on_read(
+                        address, value, self.instruction_pc,
+                        motherboard.ticks,
+                    )
+            return value
+
+        return read
+
+    def watched_write(
+        self,
+        page: Optional[memoryview],
+        handler: Callable[[int, int], None],
+        watches: List[Watch],
+    ) -> Callable[[int, int], None]:
+        callbacks = [
+            (watch.first, watch.last, watch.on_write) for watch in watches
+            if watch.on_write is not None
+        ]
+        motherboard = self.motherboard
+
+        def write(address: int, value: int) -> None:
+            if page is not None:
+                page[address & 0xFF] = value
+            else:
+                handler(address, value)
+            for first, last, on_write in callbacks:
+                if first <= address <= last:
+                    on_write(
+                        address, value, self.instruction_pc,
+                        motherboard.ticks,
+                    )
+
+        return write
+
+    def map_cartridge(self) -> None:
+        """Maps the banks currently selected by the cartridge."""
+        cartridge = self.cartridge
+        self.read_pages[0x00:0x40] = self.pages(cartridge.rom_window0, 0x40)
+        self.read_pages[0x40:0x80] = self.pages(cartridge.rom_window, 0x40)
+        ram_pages = self.pages(cartridge.ram_window, 0x20)
+        self.read_pages[0xA0:0xC0] = ram_pages
+        # the writes to battery-backed RAM mark the save file dirty
+        if cartridge.save is None:
+            self.write_pages[0xA0:0xC0] = ram_pages
+        if self.profiler is not None:
+            self.remap(first=0x00, last=0xBF)
+        for watch in self.watches:
+            self.remap(first=watch.first >> 8, last=watch.last >> 8)
+
+    def pages(
+        self,
+        window: Optional[memoryview],
+        count: int,
+    ) -> List[Optional[memoryview]]:
+        """Returns the views of the pages of a bank window (cached)."""
+        if window is None:
+            return [None] * count
+        pages = self.bank_pages.get(id(window))
+        if pages is None:
+            pages = [self.view(window, offset << 8) for offset in range(count)]
+            self.bank_pages[id(window)] = pages
+        return pages
+
+    def close(self) -> None:
+        """Releases the views of the cartridge banks, see `Cartridge.close`."""
+        for pages in self.bank_pages.values():
+            for page in pages:
+                if page is not None:
+                    page.release()
+        self.bank_pages.clear()
+
+    def view(self, buffer, offset: int) -> Optional[memoryview]:
+        if offset + 0x100 > len(buffer):
+            return None
+        return memoryview(buffer)[offset:offset + 0x100]
+
+    def block_vram(self, blocked: bool) -> None:
+        """Called by the PPU when it starts or stops reading VRAM."""
+        if blocked == self.vram_blocked:
+            return
+        self.vram_blocked = blocked
+        if self.profiler is None and not self.watches:
+            self.read_pages[0x80:0xA0] = (
+                [None] * 0x20 if blocked else self.vram_pages
+            )
+        else:
+            self.remap(first=0x80, last=0x9F)
+
+    def set_code_page(self, page: int, code: bool) -> None:
+        self.code_pages[page] = code
+        self.map_page(page=page)
+
+    def read_unmapped(self, address: int) -> int:
+        raise UnexpectedFallThrough(f'{address:04X}')
+
+    def write_unmapped(self, address: int, value: int) -> None:
+        raise UnexpectedFallThrough(f'{address:04X}: {value}')
+
+    def write_ignored(self, address: int, value: int) -> None:
+        return
+
+    def write_mbc(self, address: int, value: int) -> None:
+        self.cartridge.write(address=address, value=value)
+        self.map_cartridge()
+
+    def read_vram(self, address: int) -> int:
+        self.motherboard.sync()
+        if self.vram_blocked:
+            return 0xFF
+        return self.ppu.read(address=address)
+
+    def write_vram(self, address: int, value: int) -> None:
+        self.motherboard.sync()
+        if self.vram_blocked:
+            return
+        return self.ppu.write(address=address, value=value)
+
+    def write_code(self, address: int, value: int) -> None:
+        self.invalidate_code(address=address)
+        return self.ram.write(address=address, value=value)
+
+    def invalidate_code(self, address: int) -> None:
+        # only the translator marks the pages of code
+        translator = self.motherboard.cpu.translator
+        if translator is not None:
+            translator.invalidate(address=address)
+
+    def read_oam(self, address: int) -> int:
+        if 0xFE00 <= address <= 0xFE9F:  # OAM
+            self.motherboard.sync()
+            if self.io.dma.active or self.ppu.oam_blocked():
                 return 0xFF
             return self.ppu.read(address=address)
-        elif 0xFEA0 <= address <= 0xFEFF:  # Reserved
-            return 0
-        elif 0xFF00 <= address <= 0xFF7F:  # I/O Ports
+        return 0  # Reserved
+
+    def write_oam(self, address: int, value: int) -> None:
+        if 0xFE00 <= address <= 0xFE9F:  # OAM
+            self.motherboard.sync()
+            if self.io.dma.active or self.ppu.oam_blocked():
+                return
+            return self.ppu.write(address=address, value=value)
+        return  # Reserved
+
+    def read_high(self, address: int) -> int:
+        if 0xFF00 <= address <= 0xFF7F:  # I/O Ports
+            self.motherboard.sync()
             return self.io.read(address=address)
         elif 0xFF80 <= address <= 0xFFFE:  # Zero Page / High RAM
             return self.ram.read(address=address)
@@ -59,26 +451,15 @@ class Bus:
             return self.motherboard.cpu.int_enable_register
         raise UnexpectedFallThrough(f'{address:04X}')
 
-    def write(self, address: int, value: int) -> None:
-        if 0x0 <= address <= 0x7FFF:
-            return self.cartridge.write(address=address, value=value)
-        elif 0x8000 <= address <= 0x9FFF:  # Tile Data
-            return self.ppu.write(address=address, value=value)
-        elif 0xA000 <= address <= 0xBFFF:  # Cartridge RAM
-            return self.cartridge.write(address=address, value=value)
-        elif 0xC000 <= address <= 0xDFFF:  # Working RAM
-            return self.ram.write(address=address, value=value)
-        elif 0xE000 <= address <= 0xFDFF:  # Echo RAM
-            return
-        elif 0xFE00 <= address <= 0xFE9F:  # OAM
-            if self.io.dma.active:
-                return
-            return self.ppu.write(address=address, value=value)
-        elif 0xFEA0 <= address <= 0xFEFF:  # Reserved
-            return
-        elif 0xFF00 <= address <= 0xFF7F:  # I/O Ports
-            return self.io.write(address=address, value=value)
+    def write_high(self, address: int, value: int) -> None:
+        if 0xFF00 <= address <= 0xFF7F:  # I/O Ports
+            self.motherboard.sync()
+            self.io.write(address=address, value=value)
+            # the write may have moved the next event of the component
+            return self.motherboard.schedule()
         elif 0xFF80 <= address <= 0xFFFE:  # Zero Page / High RAM
+            if self.code_pages[0xFF]:
+                self.invalidate_code(address=address)
             return self.ram.write(address=address, value=value)
         elif address == 0xFFFF:  # CPU Interrupt Enable Register
             self.motherboard.cpu.int_enable_register = value
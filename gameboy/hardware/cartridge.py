@@ -1,6 +1,10 @@
-from array import array
+import mmap
+import os
+import threading
+from typing import Optional, Union
 
 from gameboy.common import get_logger
+from gameboy.hardware.mbc import MBC, MBC2, MBC_TYPES
 
 logger = get_logger(file=__file__)
 
@@ -14,11 +18,82 @@ RAM_BANKS = {
     0x5: 8,
 }
 
+# cartridge types with a battery keeping the external RAM
+BATTERY_TYPES = {
+    0x03, 0x06, 0x09, 0x0D, 0x0F, 0x10, 0x13, 0x1B, 0x1E, 0x22, 0xFF,
+}
+# seconds between the flushes of save files
+FLUSH_INTERVAL = 1.0
+
+
+class SaveFile:
+    """
+    Battery-backed RAM mapped from a file. Writes only touch the page cache,
+    so that they survive a crash of the emulator, and a background thread
+    writes them back to the disk if the RAM was written (`dirty`).
+    """
+
+    def __init__(self, filename: str, size: int):
+        self.filename = filename
+        # the file is created if missing, and never truncated
+        with open(filename, 'a+b') as fp:
+            if os.fstat(fp.fileno()).st_size < size:
+                fp.truncate(size)
+            self.data = mmap.mmap(fp.fileno(), size, access=mmap.ACCESS_WRITE)
+        self.dirty = False
+        self.closed = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def run(self):
+        while not self.closed.wait(FLUSH_INTERVAL):
+            if self.dirty:
+                self.dirty = False
+                self.data.flush()
+
+    def close(self):
+        if self.closed.is_set():
+            return
+        self.closed.set()
+        self.thread.join()
+        self.data.flush()
+        self.data.close()
+
 
 class Cartridge:
 
     def __init__(self, filename: str):
-        self.data = self.load(filename)
+        self.rom = self.load(filename)
+        self.data = memoryview(self.rom)
+        # windows of the 16 KiB banks, sharing the mapped file
+        self.rom_banks = [
+            self.data[offset:offset + 0x4000]
+            for offset in range(0, len(self.data), 0x4000)
+        ]
+        self.mbc = MBC_TYPES.get(self.cart_type, MBC)(cartridge=self)
+        if isinstance(self.mbc, MBC2):
+            ram_size = MBC2.RAM_SIZE
+        else:
+            ram_size = RAM_BANKS.get(self.ram_size, 0) * 0x2000
+        self.save: Optional[SaveFile] = None
+        self.ram: Union[bytearray, mmap.mmap] = bytearray(ram_size)
+        if ram_size and self.cart_type in BATTERY_TYPES:
+            self.save = SaveFile(
+                filename=os.path.splitext(filename)[0] + '.sav',
+                size=ram_size,
+            )
+            self.ram = self.save.data
+        self.ram_banks = [
+            memoryview(self.ram)[offset:offset + 0x2000]
+            for offset in range(0, len(self.ram), 0x2000)
+        ] if self.mbc.WINDOWED_RAM else []
+        # banks mapped to 0x0000 - 0x3FFF, 0x4000 - 0x7FFF and 0xA000 - 0xBFFF
+        self.rom_bank0 = 0
+        self.rom_bank = 1
+        self.rom_window0 = self.rom_banks[0]
+        self.rom_window = self.rom_banks[self.rom_bank % len(self.rom_banks)]
+        self.ram_window: Optional[memoryview] = None
+        self.mbc.switch(rom_bank0=0, rom_bank=1, ram_bank=0)
         logger.info(f'Load cartridge from {filename}.')
         logger.info(f'title    : {self.title}')
         logger.info(f'SGB flag : {self.sgb_flag}')
@@ -29,17 +104,57 @@ class Cartridge:
         logger.info(f'checksum : 0x{self.data[0x14D]:X} ({self.checksum})')
 
     def read(self, address: int) -> int:
-        if 0x0 <= address <= 0x7FFF:
-            return self.data[address]
+        if 0x0 <= address <= 0x3FFF:
+            return self.rom_window0[address]
+        elif 0x4000 <= address <= 0x7FFF:
+            return self.rom_window[address - 0x4000]
+        elif 0xA000 <= address <= 0xBFFF:
+            return self.mbc.read_ram(address=address)
         return 0
 
     def write(self, address: int, value: int) -> None:
-        return
-
-    def load(self, filename: str) -> array[int]:
+        if 0x0 <= address <= 0x7FFF:
+            return self.mbc.write(address=address, value=value)
+        elif 0xA000 <= address <= 0xBFFF:
+            if self.save is not None:
+                self.save.dirty = True
+            return self.mbc.write_ram(address=address, value=value)
+
+    def close(self) -> None:
+        """
+        Writes the battery-backed RAM back to the disk, and unmaps the files.
+        The views of the banks must not be used any more, see `Bus.close`.
+        """
+        for view in (*self.rom_banks, *self.ram_banks, self.data):
+            view.release()
+        if self.save is not None:
+            self.save.close()
+        self.rom.close()
+
+    def switch(
+        self,
+        rom_bank0: int,
+        rom_bank: int,
+        ram_bank: Optional[int] = None,
+    ) -> None:
+        """
+        Re-points the windows to the given banks. The RAM is unmapped if
+        `ram_bank` is None.
+        """
+        self.rom_bank0 = rom_bank0 % len(self.rom_banks)
+        self.rom_bank = rom_bank % len(self.rom_banks)
+        self.rom_window0 = self.rom_banks[self.rom_bank0]
+        self.rom_window = self.rom_banks[self.rom_bank]
+        if ram_bank is None or not self.ram_banks:
+            self.ram_window = None
+        else:
+            self.ram_window = self.ram_banks[ram_bank % len(self.ram_banks)]
+
+    def load(self, filename: str) -> mmap.mmap:
+        # The file is mapped read-only, so that all the instances running the
+        # same rom share its pages.
         with open(filename, 'rb') as fp:
-            data = array('B', fp.read())
-        return data
+            return mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
 
     @property
     def title(self):
@@ -0,0 +1,783 @@
+import ast
+import functools
+import linecache
+import re
+from typing import (
+    Callable, Dict, FrozenSet, List, NamedTuple, Optional, Protocol, Set,
+    Tuple, Union,
+)
+
+from gameboy.core import (
+    REG_LOOKUP, AddrMode, ConditionType, InstrType, Instruction, RegType,
+    decode_instruction,
+)
+from gameboy.hardware.cpu.tables import (
+    CB_SHIFTS, CB_TABLES, DAA_OPERANDS, DAA_RESULTS,
+)
+
+"""
+Instead of decoding every instruction at run time, we generate the Python
+source of one specialized handler per opcode. The addressing mode, registers,
+condition and cycle cost of the instruction are resolved while generating, so
+a handler only contains the work that is left for run time.
+
+A handler is described by a list of steps before it is rendered to source:
+plain lines of code, `Tick`s (machine cycles to emulate), `Access`es (lines
+which touch the bus, so the pending cycles must be emulated before them),
+`Branch`es (conditional jumps, calls and returns) and `Exit`s (used by the
+block translator to return to the CPU when an interrupt is pending, or on
+another condition).
+"""
+
+INTERRUPT_PENDING = (
+    'ime and cpu.int_flags_register & cpu.int_enable_register & 0x1F'
+)
+
+
+class Tick(NamedTuple):
+    cycles: int
+
+
+class Access(NamedTuple):
+    line: str
+
+
+class Branch(NamedTuple):
+    condition: str
+    taken: List['Step']
+    otherwise: List['Step']
+
+
+class Exit(NamedTuple):
+    pc: str
+    condition: str = INTERRUPT_PENDING
+
+
+Step = Union[str, Tick, Access, Branch, Exit]
+
+AM = AddrMode
+CT = ConditionType
+IT = InstrType
+RT = RegType
+
+REGISTERS = (
+    'a', 'b', 'c', 'd', 'e', 'h', 'l', 'sp', 'pc', 'fres', 'faux',
+)
+PAIRS = (
+    ('a', 'f', 'af'), ('b', 'c', 'bc'), ('d', 'e', 'de'), ('h', 'l', 'hl'),
+)
+BINDINGS = {
+    'read': 'cpu.bus.read',
+    'write': 'cpu.bus.write',
+    'emulate': 'cpu.motherboard.emulate',
+    'ime': 'cpu.int_master_enabled',
+}
+EPILOGUE = '# epilogue'
+LITERAL = re.compile(r'\b0x[0-9A-F]+\b')
+CONDITIONS = {
+    CT.NZ: 'fres & 0xFF',
+    CT.Z: 'not fres & 0xFF',
+    CT.NC: 'not fres & 0x100',
+    CT.C: 'fres & 0x100',
+}
+
+"""
+Flags are evaluated lazily (see `CPU`): most instructions only record their
+result in `fres` and their operands in `faux`. Instructions which need the
+F register as a byte refer to the local `f`, which is built from `fres` and
+`faux` before the instruction, and recorded back after it if assigned.
+"""
+FLAGS_LOAD = (
+    'f = (not fres & 0xFF) << 7 | (faux & 0x200) >> 3'
+    ' | ((faux ^ fres) & 0x10) << 1 | (fres & 0x100) >> 4'
+)
+FLAGS_STORE = (
+    'fres = (not f & 0x80) | (f & 0x10) << 4',
+    'faux = (f & 0x40) << 3 | (f & 0x20) >> 1',
+)
+
+
+def get(reg: RegType) -> str:
+    for hi, lo, pair in PAIRS:
+        if reg.value == pair:
+            return f'({hi} << 8 | {lo})'
+    return reg.value
+
+
+def put(reg: RegType, value: str) -> List[str]:
+    for hi, lo, pair in PAIRS:
+        if reg.value == pair:
+            return [f'w = {value}', f'{hi} = w >> 8', f'{lo} = w & 0xFF']
+    return [f'{reg.value} = {value}']
+
+
+def flags(
+    z: Union[None, int, str],
+    n: Union[None, int, str],
+    h: Union[None, int, str],
+    c: Union[None, int, str],
+) -> str:
+    """
+    Each flag is either None (unchanged), a constant 0/1, or an expression
+    evaluating to a boolean or 0/1.
+    """
+    keep, const, terms = 0, 0, []
+    for value, bit in ((z, 7), (n, 6), (h, 5), (c, 4)):
+        if value is None:
+            keep |= 1 << bit
+        elif isinstance(value, int):
+            const |= value << bit
+        else:
+            terms.append(f'({value}) << {bit}')
+    parts = [f'f & 0x{keep:02X}'] if keep else []
+    if const:
+        parts.append(f'0x{const:02X}')
+    return 'f = ' + (' | '.join(parts + terms) or '0')
+
+
+class HandlerContext:
+    """Immediate operands are fetched at run time from the program counter."""
+
+    pc = 'pc'
+
+    def imm8(self, name: str) -> Tuple[List[Step], str]:
+        return [
+            Access(f'{name} = read(pc)'),
+            Tick(1),
+            'pc = (pc + 1) & 0xFFFF',
+        ], name
+
+    def imm16(self, name: str) -> Tuple[List[Step], str]:
+        return [
+            Access(f'{name} = read(pc)'),
+            Tick(1),
+            Access(f'{name} |= read((pc + 1) & 0xFFFF) << 8'),
+            Tick(1),
+            'pc = (pc + 2) & 0xFFFF',
+        ], name
+
+
+class Context(Protocol):
+    """The source of the immediate operands, see `BlockContext`."""
+
+    @property
+    def pc(self) -> str:
+        ...
+
+    def imm8(self, name: str) -> Tuple[List[Step], str]:
+        ...
+
+    def imm16(self, name: str) -> Tuple[List[Step], str]:
+        ...
+
+
+def push16(value: str) -> List[Step]:
+    return [
+        'sp = (sp - 1) & 0xFFFF',
+        Access(f'write(sp, {value} >> 8)'),
+        'sp = (sp - 1) & 0xFFFF',
+        Access(f'write(sp, {value} & 0xFF)'),
+    ]
+
+
+def pop16() -> List[Step]:
+    return [
+        Access('lo = read(sp)'),
+        'sp = (sp + 1) & 0xFFFF',
+        Tick(1),
+        Access('hi = read(sp)'),
+        'sp = (sp + 1) & 0xFFFF',
+        Tick(1),
+    ]
+
+
+def jump(
+    cond_type: ConditionType,
+    address: str,
+    save_context: bool,
+    ctx: Context,
+) -> List[Step]:
+    steps: List[Step] = []
+    if save_context:
+        steps += [Tick(2), *push16(ctx.pc)]
+    steps += [f'pc = {address}', Tick(1)]
+    if cond_type == CT.NONE:
+        return steps
+    return [Branch(CONDITIONS[cond_type], steps, [])]
+
+
+def emit_operand(
+    instr: Instruction,
+    ctx: Context,
+) -> Tuple[List[Step], str, str]:
+    """Returns the steps to fetch the operand, its data and its address."""
+    mode, reg_1, reg_2 = instr.addr_mode, instr.reg_1, instr.reg_2
+    if mode == AM.IMP:
+        return [], '0', '0'
+    elif mode == AM.A8_R:
+        steps, n = ctx.imm8('n')
+        return steps, '0', f'(0xFF00 | {n})'
+    elif mode in (AM.A16_R, AM.D16_R):
+        steps, nn = ctx.imm16('nn')
+        return steps, get(reg_2), nn
+    elif mode in (AM.D8, AM.HL_SPR, AM.R_A8, AM.R_D8, AM.MR_D8):
+        steps, n = ctx.imm8('n')
+        if mode == AM.MR_D8:
+            return ['addr = h << 8 | l', *steps], n, 'addr'
+        return steps, n, '0'
+    elif mode in (AM.D16, AM.R_D16):
+        steps, nn = ctx.imm16('nn')
+        return steps, nn, '0'
+    elif mode in (AM.HLD_R, AM.HLI_R):
+        sign = '-' if mode == AM.HLD_R else '+'
+        return [
+            'addr = h << 8 | l',
+            *put(RT.HL, f'(addr {sign} 1) & 0xFFFF'),
+        ], get(reg_2), 'addr'
+    elif mode == AM.MR:
+        return ['addr = h << 8 | l', Tick(1)], '0', 'addr'
+    elif mode == AM.MR_R:
+        if reg_1 == RT.C:
+            return [], get(reg_2), '(0xFF00 | c)'
+        return [], get(reg_2), get(reg_1)
+    elif mode == AM.R:
+        return [], get(reg_1), '0'
+    elif mode == AM.R_A16:
+        steps, nn = ctx.imm16('nn')
+        return [*steps, Access(f'data = read({nn})'), Tick(1)], 'data', nn
+    elif mode in (AM.R_HLD, AM.R_HLI):
+        sign = '-' if mode == AM.R_HLD else '+'
+        return [
+            'addr = h << 8 | l',
+            Access('data = read(addr)'),
+            Tick(1),
+            *put(RT.HL, f'(addr {sign} 1) & 0xFFFF'),
+        ], 'data', 'addr'
+    elif mode == AM.R_MR:
+        address = '(0xFF00 | c)' if reg_2 == RT.C else get(reg_2)
+        return [Access(f'data = read({address})'), Tick(1)], 'data', address
+    elif mode == AM.R_R:
+        return [], get(reg_2), '0'
+    raise NotImplementedError(f'{mode}')
+
+
+def emit_adc(instr: Instruction, ctx: Context, data: str, address: str):
+    return [
+        'x = a', f'y = {data}', 'fres = x + y + (fres >> 8 & 1)',
+        'a = fres & 0xFF', 'faux = x ^ y',
+    ]
+
+
+def emit_add(instr: Instruction, ctx: Context, data: str, address: str):
+    if instr.reg_1 == RT.SP:
+        return [
+            'x = sp', f'y = {data}', Tick(1),
+            'sp = (x + ((y ^ 0x80) - 0x80)) & 0xFFFF',
+            flags(
+                0, 0, '(x & 0xF) + (y & 0xF) > 0xF',
+                '(x & 0xFF) + (y & 0xFF) > 0xFF',
+            ),
+        ]
+    elif instr.reg_1 == RT.HL:
+        return [
+            'x = h << 8 | l', f'y = {data}', Tick(1), 'r = x + y',
+            *put(RT.HL, 'r & 0xFFFF'),
+            flags(None, 0, '(x & 0xFFF) + (y & 0xFFF) > 0xFFF', 'r > 0xFFFF'),
+        ]
+    return [
+        'x = a', f'y = {data}', 'fres = x + y', 'a = fres & 0xFF',
+        'faux = x ^ y',
+    ]
+
+
+def emit_and(instr: Instruction, ctx: Context, data: str, address: str):
+    return [f'a &= {data}', 'fres = a', 'faux = a ^ 0x10']
+
+
+def emit_call(instr: Instruction, ctx: Context, data: str, address: str):
+    return jump(instr.cond_type, data, save_context=True, ctx=ctx)
+
+
+def emit_ccf(instr: Instruction, ctx: Context, data: str, address: str):
+    return ['fres ^= 0x100', 'faux = fres & 0x10']
+
+
+def emit_cp(instr: Instruction, ctx: Context, data: str, address: str):
+    return [f'y = {data}', 'fres = a - y', 'faux = a ^ y | 0x200']
+
+
+def emit_cpl(instr: Instruction, ctx: Context, data: str, address: str):
+    return ['a ^= 0xFF', 'faux = (fres ^ 0x10) & 0x10 | 0x200']
+
+
+def emit_daa(instr: Instruction, ctx: Context, data: str, address: str):
+    return [
+        'i = a | (faux & 0x200) >> 1 | ((faux ^ fres) & 0x10) << 5'
+        ' | (fres & 0x100) << 2',
+        'fres = DAA_RESULTS[i]', 'faux = DAA_OPERANDS[i]', 'a = fres & 0xFF',
+    ]
+
+
+def emit_dec(instr: Instruction, ctx: Context, data: str, address: str):
+    if instr.addr_mode == AM.MR:
+        return [
+            Tick(1),
+            Access(f'x = read({address})'),
+            'r = (x - 1) & 0xFF',
+            Access(f'write({address}, r)'),
+            'faux = x ^ 1 | 0x200',
+            'fres = r | fres & 0x100',
+        ]
+    elif instr.reg_1 in (RT.BC, RT.DE, RT.HL, RT.SP):
+        value = f'({get(instr.reg_1)} - 1) & 0xFFFF'
+        return [Tick(1), *put(instr.reg_1, value)]
+    r = instr.reg_1.value
+    return [
+        f'x = {r}',
+        f'{r} = (x - 1) & 0xFF',
+        'faux = x ^ 1 | 0x200',
+        f'fres = {r} | fres & 0x100',
+    ]
+
+
+def emit_di(instr: Instruction, ctx: Context, data: str, address: str):
+    return ['cpu.int_master_enabled = False']
+
+
+def emit_ei(instr: Instruction, ctx: Context, data: str, address: str):
+    return ['cpu.enabling_ime = True']
+
+
+def emit_halt(instr: Instruction, ctx: Context, data: str, address: str):
+    return ['cpu.halted = True']
+
+
+def emit_inc(instr: Instruction, ctx: Context, data: str, address: str):
+    if instr.addr_mode == AM.MR:
+        return [
+            Tick(1),
+            Access(f'x = read({address})'),
+            'r = (x + 1) & 0xFF',
+            Access(f'write({address}, r)'),
+            'faux = x ^ 1',
+            'fres = r | fres & 0x100',
+        ]
+    elif instr.reg_1 in (RT.BC, RT.DE, RT.HL, RT.SP):
+        value = f'({get(instr.reg_1)} + 1) & 0xFFFF'
+        return [Tick(1), *put(instr.reg_1, value)]
+    r = instr.reg_1.value
+    return [
+        f'x = {r}',
+        f'{r} = (x + 1) & 0xFF',
+        'faux = x ^ 1',
+        f'fres = {r} | fres & 0x100',
+    ]
+
+
+def emit_jp(instr: Instruction, ctx: Context, data: str, address: str):
+    return jump(instr.cond_type, data, save_context=False, ctx=ctx)
+
+
+def emit_jr(instr: Instruction, ctx: Context, data: str, address: str):
+    target = f'({ctx.pc} + (({data} ^ 0x80) - 0x80)) & 0xFFFF'
+    return jump(instr.cond_type, target, save_context=False, ctx=ctx)
+
+
+def emit_ld(instr: Instruction, ctx: Context, data: str, address: str):
+    if instr.addr_mode in (AM.A16_R, AM.HLD_R, AM.HLI_R, AM.MR_D8, AM.MR_R):
+        if instr.reg_2 == RT.SP:
+            return [
+                Tick(1), f'x = {data}',
+                Access(f'write({address}, x & 0xFF)'),
+                Access(f'write(({address} + 1) & 0xFFFF, x >> 8)'),
+                Tick(1),
+            ]
+        return [Access(f'write({address}, {data})'), Tick(1)]
+    elif instr.addr_mode == AM.HL_SPR:
+        return [
+            'x = sp', f'y = {data}',
+            *put(RT.HL, '(x + ((y ^ 0x80) - 0x80)) & 0xFFFF'),
+            flags(
+                0, 0, '(x & 0xF) + (y & 0xF) > 0xF',
+                '(x & 0xFF) + (y & 0xFF) > 0xFF',
+            ),
+        ]
+    return put(instr.reg_1, data)
+
+
+def emit_ldh(instr: Instruction, ctx: Context, data: str, address: str):
+    if instr.reg_1 == RT.A:
+        return [Access(f'a = read(0xFF00 | {data})'), Tick(1)]
+    return [Access(f'write({address}, a)'), Tick(1)]
+
+
+def emit_nop(instr: Instruction, ctx: Context, data: str, address: str):
+    return []
+
+
+def emit_or(instr: Instruction, ctx: Context, data: str, address: str):
+    return [f'a |= {data}', 'fres = a', 'faux = a']
+
+
+def emit_pop(instr: Instruction, ctx: Context, data: str, address: str):
+    if instr.reg_1 == RT.AF:
+        return [*pop16(), 'a = hi', 'f = lo & 0xF0']
+    return [*pop16(), *put(instr.reg_1, 'hi << 8 | lo')]
+
+
+def emit_push(instr: Instruction, ctx: Context, data: str, address: str):
+    return [
+        f'x = {get(instr.reg_1)}',
+        Tick(1),
+        'sp = (sp - 1) & 0xFFFF',
+        Access('write(sp, x >> 8)'),
+        Tick(1),
+        'sp = (sp - 1) & 0xFFFF',
+        Access('write(sp, x & 0xFF)'),
+        Tick(1),
+    ]
+
+
+def emit_ret(instr: Instruction, ctx: Context, data: str, address: str):
+    steps: List[Step] = [*pop16(), 'pc = hi << 8 | lo', Tick(1)]
+    if instr.cond_type == CT.NONE:
+        return steps
+    return [Tick(1), Branch(CONDITIONS[instr.cond_type], steps, [])]
+
+
+def emit_reti(instr: Instruction, ctx: Context, data: str, address: str):
+    steps = emit_ret(instr=instr, ctx=ctx, data=data, address=address)
+    return ['cpu.int_master_enabled = True', *steps]
+
+
+def emit_rla(instr: Instruction, ctx: Context, data: str, address: str):
+    return [
+        'x = a', 'a = (x << 1 | fres >> 8 & 1) & 0xFF',
+        'fres = (x >> 7) << 8 | 1', 'faux = 1',
+    ]
+
+
+def emit_rlca(instr: Instruction, ctx: Context, data: str, address: str):
+    return [
+        'x = a', 'a = (x << 1 | x >> 7) & 0xFF',
+        'fres = (x >> 7) << 8 | 1', 'faux = 1',
+    ]
+
+
+def emit_rra(instr: Instruction, ctx: Context, data: str, address: str):
+    return [
+        'x = a', 'a = x >> 1 | (fres & 0x100) >> 1',
+        'fres = (x & 1) << 8 | 1', 'faux = 1',
+    ]
+
+
+def emit_rrca(instr: Instruction, ctx: Context, data: str, address: str):
+    return [
+        'x = a', 'a = x >> 1 | (x & 1) << 7',
+        'fres = (x & 1) << 8 | 1', 'faux = 1',
+    ]
+
+
+def emit_rst(instr: Instruction, ctx: Context, data: str, address: str):
+    address = f'0x{instr.param:04X}'
+    return jump(instr.cond_type, address, save_context=True, ctx=ctx)
+
+
+def emit_sbc(instr: Instruction, ctx: Context, data: str, address: str):
+    return [
+        'x = a', f'y = {data}', 'fres = x - y - (fres >> 8 & 1)',
+        'a = fres & 0xFF', 'faux = x ^ y | 0x200',
+    ]
+
+
+def emit_scf(instr: Instruction, ctx: Context, data: str, address: str):
+    return ['fres |= 0x100', 'faux = fres & 0x10']
+
+
+def emit_sub(instr: Instruction, ctx: Context, data: str, address: str):
+    return [
+        'x = a', f'y = {data}', 'fres = x - y', 'a = fres & 0xFF',
+        'faux = x ^ y | 0x200',
+    ]
+
+
+def emit_xor(instr: Instruction, ctx: Context, data: str, address: str):
+    return [f'a ^= {data}', 'fres = a', 'faux = a']
+
+
+def emit_none(instr: Instruction, ctx: Context, data: str, address: str):
+    return [Access(f"raise NotImplementedError('{instr.instr_type}')")]
+
+
+emitter_mapping: Dict[InstrType, Callable[..., List[Step]]] = {
+    InstrType.ADC: emit_adc,
+    InstrType.ADD: emit_add,
+    InstrType.AND: emit_and,
+    InstrType.CALL: emit_call,
+    InstrType.CCF: emit_ccf,
+    InstrType.CP: emit_cp,
+    InstrType.CPL: emit_cpl,
+    InstrType.DAA: emit_daa,
+    InstrType.DEC: emit_dec,
+    InstrType.DI: emit_di,
+    InstrType.EI: emit_ei,
+    InstrType.HALT: emit_halt,
+    InstrType.INC: emit_inc,
+    InstrType.JP: emit_jp,
+    InstrType.JR: emit_jr,
+    InstrType.LD: emit_ld,
+    InstrType.LDH: emit_ldh,
+    InstrType.NONE: emit_none,
+    InstrType.NOP: emit_nop,
+    InstrType.OR: emit_or,
+    InstrType.POP: emit_pop,
+    InstrType.PUSH: emit_push,
+    InstrType.RET: emit_ret,
+    InstrType.RETI: emit_reti,
+    InstrType.RLA: emit_rla,
+    InstrType.RLCA: emit_rlca,
+    InstrType.RRA: emit_rra,
+    InstrType.RRCA: emit_rrca,
+    InstrType.RST: emit_rst,
+    InstrType.SBC: emit_sbc,
+    InstrType.SCF: emit_scf,
+    InstrType.STOP: emit_nop,
+    InstrType.SUB: emit_sub,
+    InstrType.XOR: emit_xor,
+}
+
+
+def emit(instr: Instruction, ctx: Context) -> List[Step]:
+    """Steps of an instruction after its opcode has been fetched."""
+    steps, data, address = emit_operand(instr=instr, ctx=ctx)
+    emitter = emitter_mapping[instr.instr_type]
+    steps = steps + emitter(instr, ctx, data, address)
+    uses, stored = usage(render(steps, indent=0), indent=0)
+    if uses.get('f') == 'load':
+        steps.insert(0, FLAGS_LOAD)
+    if 'f' in stored:
+        steps.extend(FLAGS_STORE)
+    return steps
+
+
+def emit_cb(opcode: int) -> List[Step]:
+    """Steps of a CB-prefixed instruction after its operand is fetched."""
+    reg_type = REG_LOOKUP[opcode & 0x7]
+    bit = (opcode >> 3) & 0x7
+    op_type = (opcode >> 6) & 0x3
+    if reg_type == RT.HL:
+        steps: List[Step] = [
+            'addr = h << 8 | l', Access('x = read(addr)'), Tick(3),
+        ]
+
+        def store(value: str) -> Step:
+            return Access(f'write(addr, {value})')
+    else:
+        steps = [f'x = {reg_type.value}', Tick(1)]
+
+        def store(value: str) -> Step:
+            return f'{reg_type.value} = {value}'
+    mask = 1 << bit
+    if op_type == 0x1:  # BIT
+        return steps + [
+            f'fres = x & 0x{mask:02X} | fres & 0x100', 'faux = fres ^ 0x10',
+        ]
+    elif op_type == 0x2:  # RES
+        return steps + [store(f'x & 0x{~mask & 0xFF:02X}')]
+    elif op_type == 0x3:  # SET
+        return steps + [store(f'x | 0x{mask:02X}')]
+    index = 'x | fres & 0x100' if CB_SHIFTS[bit] in ('RL', 'RR') else 'x'
+    return steps + [
+        f'fres = CB_{CB_SHIFTS[bit]}[{index}]',
+        'r = fres & 0xFF',
+        store('r'),
+        'faux = r',
+    ]
+
+
+def render(
+    steps: List[Step],
+    indent: int,
+    pending: int = 0,
+    precise: bool = True,
+) -> List[str]:
+    """
+    Renders steps to lines of source. Cycles are emulated as late as
+    possible. In precise mode that is before the next bus access, so that the
+    bus observes exactly the same timing as with one `emulate` per machine
+    cycle. Otherwise the peripherals catch up once per instruction.
+    """
+    pad = '    ' * indent
+    lines = []
+    for step in steps:
+        if isinstance(step, Tick):
+            pending += step.cycles
+        elif isinstance(step, Access):
+            if pending and precise:
+                lines.append(f'{pad}emulate({pending})')
+                pending = 0
+            lines.append(pad + step.line)
+        elif isinstance(step, Branch):
+            lines.append(f'{pad}if {step.condition}:')
+            lines.extend(render(step.taken, indent + 1, pending, precise))
+            if step.otherwise or pending:
+                lines.append(f'{pad}else:')
+                lines.extend(
+                    render(step.otherwise, indent + 1, pending, precise),
+                )
+            pending = 0
+        elif isinstance(step, Exit):
+            if pending:
+                lines.append(f'{pad}emulate({pending})')
+                pending = 0
+            lines.append(f'{pad}if {step.condition}:')
+            lines.append(f'{pad}    pc = {step.pc}')
+            lines.append(f'{pad}    {EPILOGUE}')
+        else:
+            lines.append(pad + step)
+    if pending:
+        lines.append(f'{pad}emulate({pending})')
+    return lines
+
+
+def first_uses(statements: List[ast.stmt]) -> Dict[str, str]:
+    """Whether the locals are first read ('load') or assigned ('store')."""
+    uses: Dict[str, str] = {}
+    for stmt in statements:
+        stored = set()
+        for node in ast.walk(stmt):
+            if isinstance(node, ast.Name) and node.id not in uses:
+                if isinstance(node.ctx, ast.Load):
+                    uses[node.id] = 'load'
+                else:
+                    stored.add(node.id)
+        for name in stored - uses.keys():
+            uses[name] = 'store' if isinstance(stmt, ast.Assign) else 'load'
+    return uses
+
+
+def assigned(statements: List[ast.stmt]) -> Set[str]:
+    return {
+        node.id for stmt in statements for node in ast.walk(stmt)
+        if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Store)
+    }
+
+
+@functools.lru_cache(maxsize=None)
+def statement_usage(source: str) -> Tuple[Dict[str, str], FrozenSet[str]]:
+    statements = ast.parse(source).body
+    return first_uses(statements), frozenset(assigned(statements))
+
+
+def usage(lines: List[str], indent: int) -> Tuple[Dict[str, str], Set[str]]:
+    """
+    Returns `first_uses` and `assigned` of rendered lines. The statements
+    are analyzed one by one, and cached without the constants, which do not
+    change how the locals are used.
+    """
+    pad = len('    ' * indent)
+    statements: List[List[str]] = []
+    for line in lines:
+        line = line[pad:]
+        if not line.startswith((' ', 'else:')):
+            statements.append([])
+        statements[-1].append(line)
+    uses: Dict[str, str] = {}
+    stored: Set[str] = set()
+    for statement in statements:
+        statement_uses, statement_stored = statement_usage(
+            LITERAL.sub('0', '\n'.join(statement)),
+        )
+        for local, use in statement_uses.items():
+            uses.setdefault(local, use)
+        stored |= statement_stored
+    return uses, stored
+
+
+def assemble(
+    name: str,
+    steps: List[Step],
+    tail: Optional[str] = None,
+    precise: bool = True,
+) -> str:
+    """Renders a handler, loading and storing the registers it uses."""
+    body = render(steps, indent=1, precise=precise) or ['    pass']
+    uses, stored = usage(body, indent=1)
+    first = {reg: uses.get(reg) for reg in REGISTERS}
+    exits = [index for index, line in enumerate(body) if EPILOGUE in line]
+    if exits:
+        # registers may be stored before their first assignment
+        first.update((reg, 'load') for reg in REGISTERS if reg in stored)
+    bindings = [
+        f'    {local} = {target}' for local, target in BINDINGS.items()
+        if uses.get(local) == 'load'
+    ]
+    loads = [
+        f'    {reg} = cpu.{reg}' for reg in REGISTERS if first[reg] == 'load'
+    ]
+    stores = [f'cpu.{reg} = {reg}' for reg in REGISTERS if reg in stored]
+    for index in reversed(exits):
+        pad = body[index][:-len(EPILOGUE)]
+        body[index:index + 1] = [pad + line for line in stores + ['return']]
+    lines = [
+        f'def {name}(cpu):', *bindings, *loads, *body,
+        *(f'    {line}' for line in stores),
+    ]
+    if tail is not None:
+        lines.append(f'    {tail}')
+    return '\n'.join(lines)
+
+
+def compile_source(source: str, filename: str, namespace: Dict) -> Dict:
+    # Register the source so that tracebacks show the generated lines.
+    linecache.cache[filename] = (
+        len(source), None, source.splitlines(True), filename,
+    )
+    exec(compile(source, filename, 'exec'), namespace)
+    return namespace
+
+
+def build_namespace() -> Dict:
+    """Globals of the generated code."""
+    namespace: Dict = {
+        f'CB_{name}': table for name, table in zip(CB_SHIFTS, CB_TABLES)
+    }
+    namespace.update(DAA_RESULTS=DAA_RESULTS, DAA_OPERANDS=DAA_OPERANDS)
+    return namespace
+
+
+@functools.lru_cache(maxsize=None)
+def build_handlers(
+    precise: bool = False,
+) -> Tuple[List[Callable], List[Callable]]:
+    """Builds the 256 main handlers and the 256 CB-prefixed handlers."""
+    ctx = HandlerContext()
+    # In batched mode, the cycle of the CB prefix is left to the CB handler.
+    prefix = 1 if precise else 0
+    sources = []
+    for opcode in range(0x100):
+        instr = decode_instruction(opcode=opcode)
+        if instr.instr_type == InstrType.CB:
+            # the CB handler steps over the second byte, so that the PC is
+            # the same during the accesses of all instructions
+            steps: List[Step] = [Tick(prefix), Access('cb = read(pc)')]
+            tail = 'return CB_HANDLERS[cb](cpu)'
+        else:
+            steps = [Tick(1), *emit(instr=instr, ctx=ctx)]
+            tail = None
+        sources.append(
+            assemble(f'op_{opcode:02X}', steps, tail=tail, precise=precise),
+        )
+    for opcode in range(0x100):
+        steps = [
+            Tick(2 - prefix), *emit_cb(opcode=opcode),
+            'pc = (pc + 1) & 0xFFFF',
+        ]
+        sources.append(assemble(f'cb_{opcode:02X}', steps, precise=precise))
+    namespace = compile_source(
+        '\n\n\n'.join(sources), '<gameboy-handlers>', build_namespace(),
+    )
+    handlers = [namespace[f'op_{opcode:02X}'] for opcode in range(0x100)]
+    cb_handlers = [namespace[f'cb_{opcode:02X}'] for opcode in range(0x100)]
+    namespace['CB_HANDLERS'] = cb_handlers
+    return handlers, cb_handlers
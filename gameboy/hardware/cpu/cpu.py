@@ -1,13 +1,14 @@
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Callable, Dict, Optional
 
 from gameboy.common import (
-    concat, get_bit, get_hi, get_lo, get_logger, set_bit, set_hi, set_lo,
+    concat, get_bit, get_hi, get_lo, get_logger, set_bit,
 )
 from gameboy.core import InterruptType
-from gameboy.hardware.cpu.execute import execute
-from gameboy.hardware.cpu.util import fetch_info, fetch_instruction
+from gameboy.hardware.cpu.codegen import build_handlers
+from gameboy.hardware.cpu.translator import Translator
 
 if TYPE_CHECKING:
+    from gameboy.hardware.bus import Bus
     from gameboy.hardware.motherboard import Motherboard
 
 
@@ -15,19 +16,40 @@ logger = get_logger(file=__file__)
 
 
 class CPU:
-
-    def __init__(self, motherboard: 'Motherboard'):
+    # 8-bit registers are stored directly, the `reg_*` properties compose
+    # register pairs for tools which expect them
+    __slots__ = (
+        'a', 'b', 'c', 'd', 'e', 'h', 'l', 'sp', 'pc', 'fres', 'faux',
+        'motherboard', 'bus', 'timer', 'halted', 'int_master_enabled',
+        'int_enable_register', 'int_flags_register', 'enabling_ime',
+        'cartridge', 'handlers', 'translator', 'blocks',
+    )
+
+    def __init__(
+        self,
+        motherboard: 'Motherboard',
+        translate: bool = True,
+        precise: bool = False,
+        skip_idle: bool = True,
+    ):
         # we skip boot loader at this point
-        self.af = 0x01B0
-        self.bc = 0x0013
-        self.de = 0x00D8
-        self.hl = 0x014D
+        self.a = 0x01
+        # Flags are evaluated lazily. Instead of the F register, we keep the
+        # result of the last flag-setting operation in `fres`, so that Z is
+        # `fres & 0xFF == 0` and C is bit 8 of `fres`, and the operands in
+        # `faux`, so that H is bit 4 of `faux ^ fres` and N is bit 9 of
+        # `faux`. F is only built when some instruction or tool needs it.
+        self.fres, self.faux = 0x100, 0x10  # F = 0xB0
+        self.b, self.c = 0x00, 0x13
+        self.d, self.e = 0x00, 0xD8
+        self.h, self.l = 0x01, 0x4D  # noqa: E741
         self.sp = 0xFEFF
         self.pc = 0x100
 
         self.motherboard = motherboard
-        self.bus = motherboard.bus
+        self.bus: 'Bus' = motherboard.bus
         self.timer = motherboard.timer
+        self.cartridge = motherboard.cartridge
 
         self.halted: bool = False
         self.int_master_enabled: bool = False
@@ -36,21 +58,60 @@ class CPU:
         self.enabling_ime: bool = False
         self.timer.div = 0xABCC
 
+        # In precise mode, peripherals are emulated before every memory
+        # access, otherwise they catch up once per instruction.
+        self.handlers, _ = build_handlers(precise=precise)
+        # the interpreter is used when translation is disabled, idle loops
+        # are only skipped by the translator (see `Translator`)
+        self.translator: Optional[Translator] = None
+        self.blocks: Dict[int, Callable[['CPU'], None]] = {}
+        if translate:
+            self.translator = Translator(
+                cpu=self, fallback=CPU.step, precise=precise,
+                skip_idle=skip_idle,
+            )
+            self.blocks = self.translator.blocks
+
+    def step(self):
+        opcode = self.bus.read(self.pc)
+        self.pc = (self.pc + 1) & 0xFFFF
+        self.handlers[opcode](self)
+
     def tick(self):
         if not self.halted:
-            instr = fetch_instruction(cpu=self)
-            self.emulate(1)
-            info = fetch_info(instr=instr, cpu=self)
-            execute(instr=instr, info=info, cpu=self)
+            if self.bus.watches:
+                # watches report the PC of each instruction, see `Bus.watch`
+                self.bus.instruction_pc = self.pc
+                self.step()
+                self.bus.instruction_pc = None
+            elif self.translator is None:
+                self.step()
+            else:
+                pc = self.pc
+                key = pc
+                if pc <= 0x7FFF:
+                    key |= (
+                        self.cartridge.rom_bank if pc & 0x4000
+                        else self.cartridge.rom_bank0
+                    ) << 16
+                block = self.blocks.get(key)
+                if block is None:
+                    block = self.translator.translate(pc=pc, key=key)
+                block(self)
         else:  # halted
-            self.emulate(1)
+            if self.int_flags_register:
+                self.emulate(1)
+            else:
+                # no interrupt is requested before the next event
+                self.motherboard.fast_forward()
             if self.int_flags_register:
                 self.halted = False
         if self.int_master_enabled:
             self.handle_interrupts()
-            self.enabling_ime = False
+        # EI takes effect after the next instruction, which may be DI
         if self.enabling_ime:
             self.int_master_enabled = True
+            self.enabling_ime = False
 
     def handle_interrupt(self, address: int, int_type: InterruptType):
         if (
@@ -58,8 +119,8 @@ class CPU:
             and self.int_flags_register & int_type.value
         ):
             # Jump to interrupt handler
-            self.push16(self.reg_pc)
-            self.reg_pc = address
+            self.push16(self.pc)
+            self.pc = address
             # Set flags
             self.int_flags_register &= ~int_type.value
             self.halted = False
@@ -101,8 +162,8 @@ class CPU:
         self.write(address=address + 1, value=get_hi(value))
 
     def pop(self) -> int:
-        value = self.read(self.reg_sp)
-        self.reg_sp += 1
+        value = self.read(self.sp)
+        self.sp = (self.sp + 1) & 0xFFFF
         return value
 
     def pop16(self) -> int:
@@ -111,8 +172,8 @@ class CPU:
         return concat(hi=hi, lo=lo)
 
     def push(self, value: int) -> None:
-        self.reg_sp -= 1
-        self.write(address=self.reg_sp, value=value)
+        self.sp = (self.sp - 1) & 0xFFFF
+        self.write(address=self.sp, value=value)
 
     def push16(self, value: int) -> None:
         self.push(get_hi(value))
@@ -120,91 +181,108 @@ class CPU:
 
     @property
     def reg_a(self):
-        return get_hi(self.reg_af)
+        return self.a
 
     @reg_a.setter
     def reg_a(self, new_value: int):
-        self.reg_af = set_hi(hi=new_value, value=self.reg_af)
+        self.a = new_value & 0xFF
+
+    @property
+    def reg_f(self):
+        fres, faux = self.fres, self.faux
+        return (
+            (not fres & 0xFF) << 7 | (faux & 0x200) >> 3
+            | ((faux ^ fres) & 0x10) << 1 | (fres & 0x100) >> 4
+        )
+
+    @reg_f.setter
+    def reg_f(self, new_value: int):
+        self.fres = (not new_value & 0x80) | (new_value & 0x10) << 4
+        self.faux = (new_value & 0x40) << 3 | (new_value & 0x20) >> 1
 
     @property
     def reg_b(self):
-        return get_hi(self.reg_bc)
+        return self.b
 
     @reg_b.setter
     def reg_b(self, new_value: int):
-        self.reg_bc = set_hi(hi=new_value, value=self.reg_bc)
+        self.b = new_value & 0xFF
 
     @property
     def reg_c(self):
-        return get_lo(self.reg_bc)
+        return self.c
 
     @reg_c.setter
     def reg_c(self, new_value: int):
-        self.reg_bc = set_lo(lo=new_value, value=self.reg_bc)
+        self.c = new_value & 0xFF
 
     @property
     def reg_d(self):
-        return get_hi(self.reg_de)
+        return self.d
 
     @reg_d.setter
     def reg_d(self, new_value: int):
-        self.reg_de = set_hi(hi=new_value, value=self.reg_de)
+        self.d = new_value & 0xFF
 
     @property
     def reg_e(self):
-        return get_lo(self.reg_de)
+        return self.e
 
     @reg_e.setter
     def reg_e(self, new_value: int):
-        self.reg_de = set_lo(lo=new_value, value=self.reg_de)
+        self.e = new_value & 0xFF
 
     @property
     def reg_h(self):
-        return get_hi(self.reg_hl)
+        return self.h
 
     @reg_h.setter
     def reg_h(self, new_value: int):
-        self.reg_hl = set_hi(hi=new_value, value=self.reg_hl)
+        self.h = new_value & 0xFF
 
     @property
     def reg_l(self):
-        return get_lo(self.reg_hl)
+        return self.l
 
     @reg_l.setter
     def reg_l(self, new_value: int):
-        self.reg_hl = set_lo(lo=new_value, value=self.reg_hl)
+        self.l = new_value & 0xFF  # noqa: E741
 
     @property
     def reg_af(self):
-        return self.af
+        return concat(hi=self.a, lo=self.reg_f)
 
     @reg_af.setter
     def reg_af(self, new_value: int):
-        self.af = new_value & 0xFFFF
+        self.a = get_hi(new_value)
+        self.reg_f = get_lo(new_value)
 
     @property
     def reg_bc(self):
-        return self.bc
+        return concat(hi=self.b, lo=self.c)
 
     @reg_bc.setter
     def reg_bc(self, new_value: int):
-        self.bc = new_value & 0xFFFF
+        self.b = get_hi(new_value)
+        self.c = get_lo(new_value)
 
     @property
     def reg_de(self):
-        return self.de
+        return concat(hi=self.d, lo=self.e)
 
     @reg_de.setter
     def reg_de(self, new_value: int):
-        self.de = new_value & 0xFFFF
+        self.d = get_hi(new_value)
+        self.e = get_lo(new_value)
 
     @property
     def reg_hl(self):
-        return self.hl
+        return concat(hi=self.h, lo=self.l)
 
     @reg_hl.setter
     def reg_hl(self, new_value: int):
-        self.hl = new_value & 0xFFFF
+        self.h = get_hi(new_value)
+        self.l = get_lo(new_value)  # noqa: E741
 
     @property
     def reg_sp(self):
@@ -224,32 +302,32 @@ class CPU:
 
     @property
     def flag_z(self):
-        return get_bit(self.af, 7)
+        return get_bit(self.reg_f, 7)
 
     @flag_z.setter
     def flag_z(self, new_value: bool):
-        self.af = set_bit(bool(new_value), self.af, 7)
+        self.reg_f = set_bit(bool(new_value), self.reg_f, 7)
 
     @property
     def flag_n(self):
-        return get_bit(self.af, 6)
+        return get_bit(self.reg_f, 6)
 
     @flag_n.setter
     def flag_n(self, new_value: bool):
-        self.af = set_bit(bool(new_value), self.af, 6)
+        self.reg_f = set_bit(bool(new_value), self.reg_f, 6)
 
     @property
     def flag_h(self):
-        return get_bit(self.af, 5)
+        return get_bit(self.reg_f, 5)
 
     @flag_h.setter
     def flag_h(self, new_value: bool):
-        self.af = set_bit(bool(new_value), self.af, 5)
+        self.reg_f = set_bit(bool(new_value), self.reg_f, 5)
 
     @property
     def flag_c(self):
-        return get_bit(self.af, 4)
+        return get_bit(self.reg_f, 4)
 
     @flag_c.setter
     def flag_c(self, new_value: bool):
-        self.af = set_bit(bool(new_value), self.af, 4)
+        self.reg_f = set_bit(bool(new_value), self.reg_f, 4)
@@ -0,0 +1,74 @@
+from array import array
+from typing import List, Tuple
+
+"""
+Lookup tables for the CB-prefixed shifts and rotates and for DAA. Entries
+are stored in the lazy flag format of `CPU`, so that handlers can copy them
+to `fres` directly.
+"""
+
+CB_SHIFTS = ('RLC', 'RRC', 'RL', 'RR', 'SLA', 'SRA', 'SWAP', 'SRL')
+
+
+def shift(kind: int, value: int, carry: int) -> Tuple[int, int]:
+    if kind == 0x0:  # RLC
+        return ((value << 1) | (value >> 7)) & 0xFF, value >> 7
+    elif kind == 0x1:  # RRC
+        return (value >> 1) | ((value & 0x1) << 7), value & 0x1
+    elif kind == 0x2:  # RL
+        return ((value << 1) | carry) & 0xFF, value >> 7
+    elif kind == 0x3:  # RR
+        return (value >> 1) | (carry << 7), value & 0x1
+    elif kind == 0x4:  # SLA
+        return (value << 1) & 0xFF, value >> 7
+    elif kind == 0x5:  # SRA
+        return (value >> 1) | (value & 0x80), value & 0x1
+    elif kind == 0x6:  # SWAP
+        return ((value >> 4) | (value << 4)) & 0xFF, 0
+    return value >> 1, value & 0x1  # SRL
+
+
+def build_cb_tables() -> List['array[int]']:
+    """
+    Each table is indexed by `value | carry << 8` and holds
+    `result | carry << 8`, the Z/C flags following from the result.
+    """
+    tables = []
+    for kind in range(len(CB_SHIFTS)):
+        table = array('H', bytes(0x400))
+        for index in range(0x200):
+            result, carry = shift(
+                kind=kind, value=index & 0xFF, carry=index >> 8,
+            )
+            table[index] = result | (carry << 8)
+        tables.append(table)
+    return tables
+
+
+def build_daa_tables() -> Tuple['array[int]', 'array[int]']:
+    """
+    Both tables are indexed by `a | n << 8 | h << 9 | c << 10`. The first
+    one holds `fres`, the second one holds `faux` after DAA.
+    """
+    results = array('H', bytes(0x1000))
+    operands = array('H', bytes(0x1000))
+    for index in range(0x800):
+        value = index & 0xFF
+        flag_n = (index >> 8) & 0x1
+        flag_h = (index >> 9) & 0x1
+        flag_c = index >> 10
+        adjust, carry = 0, 0
+        if flag_h or (not flag_n and (value & 0xF) > 0x9):
+            adjust = 0x6
+        if flag_c or (not flag_n and value > 0x99):
+            adjust |= 0x60
+            carry = 1
+        value = (value - adjust if flag_n else value + adjust) & 0xFF
+        results[index] = value | (carry << 8)
+        # H is always reset, N is kept
+        operands[index] = (value & 0x10) | (flag_n << 9)
+    return results, operands
+
+
+CB_TABLES = build_cb_tables()
+DAA_RESULTS, DAA_OPERANDS = build_daa_tables()
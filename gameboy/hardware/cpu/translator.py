@@ -0,0 +1,312 @@
+import ast
+import re
+from typing import (
+    TYPE_CHECKING, Callable, Dict, Iterator, List, Optional, Set, Tuple,
+)
+
+from gameboy.core import (
+    AddrMode, InstrType, Instruction, decode_instruction,
+)
+from gameboy.hardware.cpu.codegen import (
+    REGISTERS, Access, Branch, Exit, Step, Tick, assemble, assigned,
+    build_namespace, compile_source, emit, emit_cb, first_uses, render,
+)
+
+if TYPE_CHECKING:
+    from gameboy.hardware.cpu.cpu import CPU
+
+"""
+The translator compiles straight-line basic blocks of game code into Python
+functions. A block runs several instructions with the registers kept in
+locals and the immediate operands folded into the code. The timing of bus
+accesses is the same as with the interpreter (in either timing mode), and a
+block returns to the CPU after any instruction that leaves an interrupt
+pending.
+
+Blocks are cached by ROM bank and address. Blocks translated from RAM are
+invalidated when the bus writes to the pages they were translated from, and
+end after every instruction which writes to memory, so that they never run
+code which was modified by themselves. Likewise, blocks end after writes to
+the memory bank controller, which may switch the bank they run from, and
+return after writes to other addresses if the bank was switched. Code is only
+translated once it started a few times, it is interpreted until then.
+
+A block which jumps back to its own start, and only reads registers that
+change at scheduled events, is an idle loop: every iteration does the same
+until the next event. After one iteration, the iterations which end before
+the next event are skipped at once. Only translated loops are skipped, the
+interpreter runs every iteration whatever `skip_idle` is.
+"""
+
+TERMINATORS = {
+    InstrType.CALL, InstrType.DI, InstrType.EI, InstrType.HALT, InstrType.JP,
+    InstrType.JR, InstrType.RET, InstrType.RETI, InstrType.RST,
+    InstrType.STOP,
+}
+MAX_BLOCK_SIZE = 64
+# blocks are interpreted until they started this many times
+HOT_THRESHOLD = 16
+# pages of RAM rewritten more often than this are left to the interpreter
+MAX_INVALIDATIONS = 16
+BANK_SWITCH = re.compile(r'write\(0x[0-7][0-9A-F]{3},')
+# writes to a constant address, or to the I/O registers
+FIXED_WRITE = re.compile(r'write\((0x[0-9A-F]{4}|\(0xFF00 \| \w+\)),')
+# DIV, IF, STAT and LY
+POLLED_REGISTERS = {0xFF04, 0xFF0F, 0xFF41, 0xFF44}
+DIV_TICKS = 0x100
+
+
+def translatable(address: int) -> bool:
+    return (
+        0x0000 <= address <= 0x7FFF  # Cartridge ROM
+        or 0xC000 <= address <= 0xDFFF  # Working RAM
+        or 0xFF80 <= address <= 0xFFFE  # High RAM
+    )
+
+
+def region(address: int) -> int:
+    if address <= 0x3FFF:
+        return 0
+    elif address <= 0x7FFF:
+        return 1
+    return address >> 8  # Each page of RAM is checked separately
+
+
+def accesses(steps: List[Step]) -> Iterator[str]:
+    for step in steps:
+        if isinstance(step, Access):
+            yield step.line
+        elif isinstance(step, Branch):
+            yield from accesses(step.taken)
+            yield from accesses(step.otherwise)
+
+
+def writes_memory(steps: List[Step]) -> bool:
+    return any('write(' in line for line in accesses(steps))
+
+
+def switches_bank(steps: List[Step]) -> bool:
+    """Whether the steps write to a fixed address of the rom area."""
+    return any(BANK_SWITCH.match(line) for line in accesses(steps))
+
+
+def may_switch_bank(steps: List[Step]) -> bool:
+    """Whether the steps write to an address which is not fixed."""
+    return any(
+        line.startswith('write(') and not FIXED_WRITE.match(line)
+        for line in accesses(steps)
+    )
+
+
+def jump_target(
+    instr: Instruction,
+    read: Callable[[int], int],
+    address: int,
+) -> Optional[int]:
+    if instr.instr_type == InstrType.JR:
+        offset = read((address + 1) & 0xFFFF)
+        return (address + 2 + ((offset ^ 0x80) - 0x80)) & 0xFFFF
+    elif instr.instr_type == InstrType.JP and instr.addr_mode == AddrMode.D16:
+        lo = read((address + 1) & 0xFFFF)
+        hi = read((address + 2) & 0xFFFF)
+        return hi << 8 | lo
+    return None
+
+
+def polled_registers(steps: List[Step]) -> Optional[Set[int]]:
+    """
+    Returns the registers read by the steps if they read nothing else, write
+    nothing and assign no register which they read before, or None.
+    """
+    statements = ast.parse('\n'.join(render(steps, indent=0))).body
+    polled: Set[int] = set()
+    for node in (node for stmt in statements for node in ast.walk(stmt)):
+        if isinstance(node, ast.Attribute) and isinstance(node.ctx, ast.Store):
+            return None
+        elif isinstance(node, ast.Call):
+            name = getattr(node.func, 'id', None)
+            if name == 'emulate':
+                continue
+            address = node.args[0] if name == 'read' else None
+            if address is None or any(
+                isinstance(child, ast.Name) for child in ast.walk(address)
+            ):
+                return None
+            register = eval(compile(ast.Expression(address), '', 'eval'))
+            if register not in POLLED_REGISTERS:
+                return None
+            polled.add(register)
+    stored = assigned(statements)
+    uses = first_uses(statements)
+    for reg in REGISTERS:
+        if reg != 'pc' and reg in stored and uses.get(reg) == 'load':
+            return None
+    return polled
+
+
+class BlockContext:
+    """Immediate operands are known while translating."""
+
+    def __init__(self, read: Callable[[int], int], address: int):
+        self.read = read
+        self.address = address
+        self.length = 1
+
+    @property
+    def pc(self) -> str:
+        return f'0x{(self.address + self.length) & 0xFFFF:04X}'
+
+    def fetch(self) -> int:
+        value = self.read((self.address + self.length) & 0xFFFF)
+        self.length += 1
+        return value
+
+    def imm8(self, name: str) -> Tuple[List[Step], str]:
+        return [Tick(1)], f'0x{self.fetch():02X}'
+
+    def imm16(self, name: str) -> Tuple[List[Step], str]:
+        lo = self.fetch()
+        hi = self.fetch()
+        return [Tick(2)], f'0x{hi << 8 | lo:04X}'
+
+
+class Translator:
+
+    def __init__(
+        self,
+        cpu: 'CPU',
+        fallback: Callable[['CPU'], None],
+        precise: bool = False,
+        skip_idle: bool = True,
+    ):
+        self.cpu = cpu
+        self.bus = cpu.bus
+        self.fallback = fallback
+        self.precise = precise
+        self.skip_idle = skip_idle
+        self.blocks: Dict[int, Callable[['CPU'], None]] = {}
+        self.ram_blocks: Dict[int, Set[int]] = {}
+        self.invalidations: Dict[int, int] = {}
+        # times the blocks which are not translated yet started
+        self.starts: Dict[int, int] = {}
+        self.namespace = build_namespace()
+        # statistics of idle loops
+        self.idle_loops = 0
+        self.skipped_cycles = 0
+
+    def translate(self, pc: int, key: int) -> Callable[['CPU'], None]:
+        """
+        Translates the block at `pc` and caches it with `key`. Code which
+        cannot be translated is left to the interpreter (`fallback`), as is
+        code which has not run often enough to pay off the translation.
+        """
+        starts = self.starts.get(key, 0) + 1
+        if starts < HOT_THRESHOLD:
+            self.starts[key] = starts
+            return self.fallback
+        self.starts.pop(key, None)
+        if (
+            not translatable(pc)
+            or self.invalidations.get(pc >> 8, 0) > MAX_INVALIDATIONS
+        ):
+            self.blocks[key] = self.fallback
+            return self.fallback
+        read = self.bus.peek
+        steps: List[Step] = []
+        address = pc
+        target = None
+        for _ in range(MAX_BLOCK_SIZE):
+            opcode = read(address)
+            instr = decode_instruction(opcode=opcode)
+            if instr.instr_type == InstrType.NONE:
+                break
+            ctx = BlockContext(read=read, address=address)
+            if instr.instr_type == InstrType.CB:
+                instr_steps = [Tick(2), *emit_cb(opcode=ctx.fetch())]
+            else:
+                instr_steps = [Tick(1), *emit(instr=instr, ctx=ctx)]
+            next_pc = (address + ctx.length) & 0xFFFF
+            last = (
+                instr.instr_type in TERMINATORS
+                or not translatable(next_pc)
+                or region(next_pc) != region(pc)
+                or (pc >= 0x8000 and writes_memory(instr_steps))
+                or switches_bank(instr_steps)
+            )
+            if last:
+                steps += [f'pc = {ctx.pc}', *instr_steps]
+                target = jump_target(instr=instr, read=read, address=address)
+                address = next_pc
+                break
+            steps += [*instr_steps, Exit(pc=ctx.pc)]
+            if pc <= 0x7FFF and may_switch_bank(instr_steps):
+                window = 'rom_bank0' if pc <= 0x3FFF else 'rom_bank'
+                steps.append(Exit(
+                    pc=ctx.pc,
+                    condition=f'cpu.cartridge.{window} != {key >> 16}',
+                ))
+            address = next_pc
+        if steps and isinstance(steps[-1], Exit):
+            # interrupts after the last instruction are left to the CPU
+            steps[-1] = f'pc = {steps[-1].pc}'
+        if steps:
+            name = f'block_{key:06X}'
+            source = assemble(name=name, steps=steps, precise=self.precise)
+            namespace = compile_source(source, f'<{name}>', self.namespace)
+            block = namespace.pop(name)
+            if self.skip_idle and target == pc:
+                polled = polled_registers(steps)
+                if polled is not None:
+                    block = self.idle_loop(
+                        block=block, pc=pc, polls_div=0xFF04 in polled,
+                    )
+        else:
+            block = self.fallback
+        self.blocks[key] = block
+        if pc >= 0x8000:
+            for page in range(pc >> 8, (max(address - 1, pc) >> 8) + 1):
+                self.ram_blocks.setdefault(page, set()).add(key)
+                self.bus.set_code_page(page=page, code=True)
+        return block
+
+    def idle_loop(
+        self,
+        block: Callable[['CPU'], None],
+        pc: int,
+        polls_div: bool,
+    ) -> Callable[['CPU'], None]:
+        motherboard = self.cpu.motherboard
+        timer = motherboard.timer
+        self.idle_loops += 1
+
+        def run(cpu: 'CPU'):
+            start = motherboard.ticks
+            # the registers read by the loop do not change until then
+            deadline = motherboard.idle_deadline()
+            if polls_div:
+                counter = (start + timer.div_offset) % DIV_TICKS
+                deadline = min(deadline, start + DIV_TICKS - counter)
+            block(cpu)
+            if cpu.pc != pc:
+                return
+            if (
+                (cpu.int_master_enabled or cpu.enabling_ime)
+                and cpu.int_flags_register & cpu.int_enable_register & 0x1F
+            ):
+                return
+            period = motherboard.ticks - start
+            iterations = (deadline - start) // period - 1
+            if iterations > 0:
+                cycles = iterations * period >> 2
+                self.skipped_cycles += cycles
+                motherboard.emulate(cycles=cycles)
+
+        return run
+
+    def invalidate(self, address: int) -> None:
+        """Drops the blocks translated from the page of `address`."""
+        page = address >> 8
+        for key in self.ram_blocks.pop(page, ()):
+            self.blocks.pop(key, None)
+        self.bus.set_code_page(page=page, code=False)
+        self.invalidations[page] = self.invalidations.get(page, 0) + 1
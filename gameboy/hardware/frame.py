@@ -0,0 +1,38 @@
+from array import array
+from typing import Union
+
+from gameboy.common import UnexpectedFallThrough
+
+"""
+The PPU keeps a byte per pixel: the palette (0 for BGP, 1 for OBP0 and 2 for
+OBP1) << 2 | the shade (0 - 3, from white to black). The pixels are mapped to
+the colors of the host only when a frame is read, see `PPU.frame`.
+"""
+
+# the palettes share the shades
+SHADES = (0xFFFFFFFF, 0xFFAAAAAA, 0xFF555555, 0xFF000000)
+
+
+def rgb565(argb: int) -> int:
+    red, green, blue = (argb >> 16) & 0xFF, (argb >> 8) & 0xFF, argb & 0xFF
+    return (red >> 3) << 11 | (green >> 2) << 5 | blue >> 3
+
+
+ARGB = [SHADES[pixel & 0x3] for pixel in range(0x100)]
+RGB565 = [rgb565(argb=color) for color in ARGB]
+GRAYSCALE = bytes(color & 0xFF for color in ARGB)
+
+
+def convert(
+    pixels: bytearray,
+    format: str,
+) -> Union[bytes, 'array[int]']:
+    if format == 'argb':
+        return array('I', map(ARGB.__getitem__, pixels))
+    elif format == 'rgb565':
+        return array('H', map(RGB565.__getitem__, pixels))
+    elif format == 'grayscale':
+        return bytes(pixels).translate(GRAYSCALE)
+    elif format == 'raw':
+        return bytes(pixels)
+    raise UnexpectedFallThrough(f'format: {format}')
@@ -1,8 +1,8 @@
 # from gameboy.common import UnexpectedFallThrough
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Optional
 
 from gameboy.common import set_bit
-from gameboy.core import Event, EventType
+from gameboy.core import Event, EventType, InterruptType
 
 if TYPE_CHECKING:
     from gameboy.hardware import Motherboard
@@ -98,30 +98,74 @@ class DMA:
         self.base = value
         self.start_delay = 2
 
-    def tick(self):
-        if self.active:
-            if self.start_delay:
-                self.start_delay -= 1
-                return
-            addr = self.base * 0x100 + self.offset
-            value = self.motherboard.bus.read(address=addr)
-            self.motherboard.ppu.oam[self.offset] = value
-            self.offset += 1
+    def advance(self, cycles: int):
+        """Transfers the bytes of `cycles` M-cycles, one byte per M-cycle."""
+        if not self.active:
+            return
+        delay = min(cycles, self.start_delay)
+        self.start_delay -= delay
+        count = min(cycles - delay, 0xA0 - self.offset)
+        if count > 0:
+            bus = self.motherboard.bus
+            # the transfer may run during an instruction, which does not read
+            # the source itself, see `Bus.watch`
+            pc, bus.instruction_pc = bus.instruction_pc, None
+            data = bus.read_block(
+                address=self.base * 0x100 + self.offset, length=count,
+            )
+            bus.instruction_pc = pc
+            oam = memoryview(self.motherboard.ppu.oam)
+            oam[self.offset:self.offset + count] = data
+            self.offset += count
             self.active = self.offset < 0xA0
 
+    def pending(self) -> int:
+        """Returns the M-cycles until the transfer completes."""
+        return self.start_delay + 0xA0 - self.offset if self.active else 0
+
+    def next_event(self) -> Optional[int]:
+        # the source may be written while transferring, so that the bytes are
+        # copied on time
+        return 4 if self.active else None
+
 
 class Serial:
+    # 8 bits are shifted at 8192 Hz with the internal clock
+    TRANSFER_TICKS = 8 * 512
 
-    def __init__(self):
+    def __init__(self, motherboard: 'Motherboard'):
         self.data = 0
         self.control = 0
+        self.remaining = 0
+
+        self.motherboard = motherboard
+
+    def write_control(self, value: int):
+        self.control = value
+        # only transfers with the internal clock complete by themselves
+        if value & 0x81 == 0x81:
+            self.remaining = self.TRANSFER_TICKS
+        else:
+            self.remaining = 0
+
+    def advance(self, ticks: int):
+        if self.remaining:
+            self.remaining = max(0, self.remaining - ticks)
+            if not self.remaining:
+                # no other device is connected
+                self.data = 0xFF
+                self.control &= 0x7F
+                self.motherboard.cpu.request_interrupt(InterruptType.SERIAL)
+
+    def next_event(self) -> Optional[int]:
+        return self.remaining or None
 
 
 class IO:
 
     def __init__(self, motherboard: 'Motherboard'):
         self.joypad = Joypad()
-        self.serial = Serial()
+        self.serial = Serial(motherboard=motherboard)
         self.dma = DMA(motherboard=motherboard)
         self.motherboard = motherboard
         self.lcd = motherboard.lcd
@@ -154,13 +198,14 @@ class IO:
             self.serial.data = value
             return
         elif address == 0xFF02:
-            self.serial.control = value
-            return
+            return self.serial.write_control(value=value)
         elif 0xFF04 <= address <= 0xFF07:
             return self.timer.write(address=address, value=value)
         elif address == 0xFF0F:
             self.motherboard.cpu.int_flags_register = value
             return
+        elif address == 0xFF40:
+            return self.motherboard.ppu.write_control(value=value)
         elif 0xFF40 <= address <= 0xFF45:
             return self.lcd.write(address=address, value=value)
         elif address == 0xFF46:
@@ -1,7 +1,6 @@
 from enum import IntEnum, IntFlag
-from typing import List
 
-from gameboy.common import UnexpectedFallThrough, get_bit, set_bit
+from gameboy.common import UnexpectedFallThrough
 
 
 class LCDMode(IntEnum):
@@ -11,18 +10,6 @@ class LCDMode(IntEnum):
     TRANSFERRING = 3
 
 
-"""
-Instantiating enum object from value is time consuming, so we prepare a lookup
-table here for optimization.
-"""
-LCD_MODE_LOOKUP = [
-    LCDMode.HBLANK,
-    LCDMode.VBLANK,
-    LCDMode.OAM_SCAN,
-    LCDMode.TRANSFERRING,
-]
-
-
 class InterruptSource(IntFlag):
     HBLANK = 1 << 3
     VBLANK = 1 << 4
@@ -30,11 +17,20 @@ class InterruptSource(IntFlag):
     LYC = 1 << 6
 
 
+"""
+The PPU reads the bits of LCDC and STAT far more often than they are written,
+so that they are decoded into plain fields when the registers are written.
+"""
+
+
 class LCD:
 
     def __init__(self):
-        self.lcd_control = 0x91  # 0xFF40, R/W
-        self.lcd_status = 0  # 0xFF41, Mixed
+        self.write_control(0x91)  # 0xFF40, R/W
+        # 0xFF41, Mixed: the mode and the LYC flag are read-only
+        self.lcds_sources = 0
+        self.lcds_lyc = False
+        self.lcds_mode = LCDMode.HBLANK
         self.scroll_y = 0  # 0xFF42, R/W
         self.scroll_x = 0  # 0xFF43, R/W
         self.ly = 0  # 0xFF44, R
@@ -45,10 +41,12 @@ class LCD:
         self.window_y = 0  # 0xFF4A, R/W
         self.window_x = 0  # 0xFF4B, R/W
 
-        self.default_colors = [0xFFFFFFFF, 0xFFAAAAAA, 0xFF555555, 0xFF000000]
-        self.bg_colors = self.default_colors[:]
-        self.obj0_colors = self.default_colors[:]
-        self.obj1_colors = self.default_colors[:]
+        # the colors are the pixels of the frame, see `gameboy.hardware.frame`
+        self.bg_colors = [0, 1, 2, 3]
+        self.obj0_colors = [4, 5, 6, 7]
+        self.obj1_colors = [8, 9, 10, 11]
+        # by the palette number of the pixels
+        self.palettes = (self.bg_colors, self.obj0_colors, self.obj1_colors)
 
     def read(self, address: int) -> int:
         if address == 0xFF40:
@@ -77,10 +75,9 @@ class LCD:
 
     def write(self, address: int, value: int) -> None:
         if address == 0xFF40:
-            self.lcd_control = value
-            return
+            return self.write_control(value=value)
         elif address == 0xFF41:
-            self.lcd_status = value
+            self.lcds_sources = value & 0xF8
             return
         elif address == 0xFF42:
             self.scroll_y = value
@@ -96,15 +93,15 @@ class LCD:
             return
         elif address == 0xFF47:
             self.bg_palette = value
-            self.update_palette(self.bg_colors, value)
+            self.update_palette(number=0, value=value)
             return
         elif address == 0xFF48:
             self.obj0_palette = value
-            self.update_palette(self.obj0_colors, value & 0xFC)
+            self.update_palette(number=1, value=value & 0xFC)
             return
         elif address == 0xFF49:
             self.obj1_palette = value
-            self.update_palette(self.obj1_colors, value & 0xFC)
+            self.update_palette(number=2, value=value & 0xFC)
             return
         elif address == 0xFF4A:
             self.window_y = value
@@ -114,60 +111,27 @@ class LCD:
             return
         raise UnexpectedFallThrough
 
-    def update_palette(self, palette: List[int], value: int):
-        palette[0] = self.default_colors[value & 0x3]
-        palette[1] = self.default_colors[(value >> 2) & 0x3]
-        palette[2] = self.default_colors[(value >> 4) & 0x3]
-        palette[3] = self.default_colors[(value >> 6) & 0x3]
-
-    @property
-    def lcdc_bgw_enable(self):
-        return get_bit(self.lcd_control, 0)
-
-    @property
-    def lcdc_obj_enable(self):
-        return get_bit(self.lcd_control, 1)
-
-    @property
-    def lcdc_obj_height(self):
-        return 16 if get_bit(self.lcd_control, 2) else 8
+    def update_palette(self, number: int, value: int):
+        palette = self.palettes[number]
+        palette[0] = number << 2 | value & 0x3
+        palette[1] = number << 2 | (value >> 2) & 0x3
+        palette[2] = number << 2 | (value >> 4) & 0x3
+        palette[3] = number << 2 | (value >> 6) & 0x3
+
+    def write_control(self, value: int) -> None:
+        self.lcd_control = value
+        self.lcdc_bgw_enable = bool(value & 0x01)
+        self.lcdc_obj_enable = bool(value & 0x02)
+        self.lcdc_obj_height = 16 if value & 0x04 else 8
+        self.lcdc_bg_map_area = 0x9C00 if value & 0x08 else 0x9800
+        self.lcdc_bgw_data_area = 0x8000 if value & 0x10 else 0x8800
+        self.lcdc_win_enable = bool(value & 0x20)
+        self.lcdc_win_map_area = 0x9C00 if value & 0x40 else 0x9800
+        self.lcdc_lcd_enable = bool(value & 0x80)
 
     @property
-    def lcdc_bg_map_area(self):
-        return 0x9C00 if get_bit(self.lcd_control, 3) else 0x9800
-
-    @property
-    def lcdc_bgw_data_area(self):
-        return 0x8000 if get_bit(self.lcd_control, 4) else 0x8800
-
-    @property
-    def lcdc_win_enable(self):
-        return get_bit(self.lcd_control, 5)
-
-    @property
-    def lcdc_win_map_area(self):
-        return 0x9C00 if get_bit(self.lcd_control, 6) else 0x9800
-
-    @property
-    def lcdc_lcd_enable(self):
-        return get_bit(self.lcd_control, 7)
-
-    @property
-    def lcds_mode(self):
-        return LCD_MODE_LOOKUP[self.lcd_status & 0x3]
-
-    @lcds_mode.setter
-    def lcds_mode(self, mode: LCDMode):
-        self.lcd_status &= 0xFC
-        self.lcd_status |= mode.value
-
-    @property
-    def lcds_lyc(self):
-        return get_bit(self.lcd_status, 2)
-
-    @lcds_lyc.setter
-    def lcds_lyc(self, new_value: bool):
-        self.lcd_status = set_bit(bool(new_value), self.lcd_status, 2)
+    def lcd_status(self) -> int:
+        return self.lcds_sources | self.lcds_lyc << 2 | self.lcds_mode
 
     def lcds_stat_int(self, int_source: InterruptSource):
-        return self.lcd_status & int_source.value
+        return self.lcds_sources & int_source
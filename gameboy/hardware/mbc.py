@@ -0,0 +1,176 @@
+from typing import TYPE_CHECKING, Dict, Optional, Type
+
+if TYPE_CHECKING:
+    from gameboy.hardware.cartridge import Cartridge
+
+"""
+Memory bank controllers only decode the writes to the rom area and to the
+external RAM. The banks themselves are switched by re-pointing the windows
+of the cartridge, see `Cartridge.switch`.
+"""
+
+
+class MBC:
+    """Cartridges without a memory bank controller."""
+    # whether the external RAM is mapped by 8 KiB windows
+    WINDOWED_RAM = True
+
+    def __init__(self, cartridge: 'Cartridge'):
+        self.cartridge = cartridge
+        self.ram_enabled = True
+
+    def switch(
+        self,
+        rom_bank0: int,
+        rom_bank: int,
+        ram_bank: Optional[int],
+    ):
+        self.cartridge.switch(
+            rom_bank0=rom_bank0, rom_bank=rom_bank,
+            ram_bank=ram_bank if self.ram_enabled else None,
+        )
+
+    def write(self, address: int, value: int) -> None:
+        return
+
+    def read_ram(self, address: int) -> int:
+        # disabled or missing RAM reads as an open bus
+        window = self.cartridge.ram_window
+        if window is None or address - 0xA000 >= len(window):
+            return 0xFF
+        return window[address - 0xA000]
+
+    def write_ram(self, address: int, value: int) -> None:
+        window = self.cartridge.ram_window
+        if window is None or address - 0xA000 >= len(window):
+            return
+        window[address - 0xA000] = value
+
+
+class MBC1(MBC):
+
+    def __init__(self, cartridge: 'Cartridge'):
+        super().__init__(cartridge=cartridge)
+        self.ram_enabled = False
+        self.bank_lo = 1
+        self.bank_hi = 0
+        self.mode = 0
+
+    def write(self, address: int, value: int) -> None:
+        if address <= 0x1FFF:
+            self.ram_enabled = value & 0xF == 0xA
+        elif address <= 0x3FFF:
+            self.bank_lo = value & 0x1F or 1
+        elif address <= 0x5FFF:
+            self.bank_hi = value & 0x3
+        else:
+            self.mode = value & 0x1
+        # in mode 1, the upper bits also switch bank 0 and the RAM bank
+        self.switch(
+            rom_bank0=self.bank_hi << 5 if self.mode else 0,
+            rom_bank=self.bank_hi << 5 | self.bank_lo,
+            ram_bank=self.bank_hi if self.mode else 0,
+        )
+
+
+class MBC2(MBC):
+    # 512 half-bytes of RAM are built in
+    RAM_SIZE = 0x200
+    WINDOWED_RAM = False
+
+    def __init__(self, cartridge: 'Cartridge'):
+        super().__init__(cartridge=cartridge)
+        self.ram_enabled = False
+
+    def write(self, address: int, value: int) -> None:
+        if address > 0x3FFF:
+            return
+        if address & 0x100:
+            self.switch(
+                rom_bank0=0, rom_bank=value & 0xF or 1, ram_bank=None,
+            )
+        else:
+            self.ram_enabled = value & 0xF == 0xA
+
+    def read_ram(self, address: int) -> int:
+        if not self.ram_enabled:
+            return 0xFF
+        return self.cartridge.ram[address & 0x1FF] | 0xF0
+
+    def write_ram(self, address: int, value: int) -> None:
+        if self.ram_enabled:
+            self.cartridge.ram[address & 0x1FF] = value & 0xF
+
+
+class MBC3(MBC):
+    """
+    The registers of the real time clock are kept and latched, but they do
+    not advance.
+    """
+
+    def __init__(self, cartridge: 'Cartridge'):
+        super().__init__(cartridge=cartridge)
+        self.ram_enabled = False
+        self.rom_bank = 1
+        self.ram_bank = 0
+        self.latch = 0xFF
+        # seconds, minutes, hours, day (low), day (high) and flags
+        self.rtc = bytearray(5)
+        self.latched_rtc = bytearray(5)
+
+    def write(self, address: int, value: int) -> None:
+        if address <= 0x1FFF:
+            self.ram_enabled = value & 0xF == 0xA
+        elif address <= 0x3FFF:
+            self.rom_bank = value & 0x7F or 1
+        elif address <= 0x5FFF:
+            self.ram_bank = value & 0xF
+        else:
+            if self.latch == 0 and value == 1:
+                self.latched_rtc[:] = self.rtc
+            self.latch = value
+        # RTC registers are selected by banks 0x08 - 0x0C
+        ram_bank = self.ram_bank if self.ram_bank <= 0x7 else None
+        self.switch(rom_bank0=0, rom_bank=self.rom_bank, ram_bank=ram_bank)
+
+    def read_ram(self, address: int) -> int:
+        if self.ram_enabled and 0x08 <= self.ram_bank <= 0x0C:
+            return self.latched_rtc[self.ram_bank - 0x08]
+        return super().read_ram(address=address)
+
+    def write_ram(self, address: int, value: int) -> None:
+        if self.ram_enabled and 0x08 <= self.ram_bank <= 0x0C:
+            self.rtc[self.ram_bank - 0x08] = value
+            return
+        return super().write_ram(address=address, value=value)
+
+
+class MBC5(MBC):
+
+    def __init__(self, cartridge: 'Cartridge'):
+        super().__init__(cartridge=cartridge)
+        self.ram_enabled = False
+        self.rom_bank = 1
+        self.ram_bank = 0
+
+    def write(self, address: int, value: int) -> None:
+        if address <= 0x1FFF:
+            self.ram_enabled = value & 0xF == 0xA
+        elif address <= 0x2FFF:
+            self.rom_bank = (self.rom_bank & 0x100) | value
+        elif address <= 0x3FFF:
+            self.rom_bank = (self.rom_bank & 0xFF) | (value & 0x1) << 8
+        elif address <= 0x5FFF:
+            self.ram_bank = value & 0xF
+        self.switch(
+            rom_bank0=0, rom_bank=self.rom_bank, ram_bank=self.ram_bank,
+        )
+
+
+MBC_TYPES: Dict[int, Type[MBC]] = {
+    0x00: MBC, 0x08: MBC, 0x09: MBC,
+    0x01: MBC1, 0x02: MBC1, 0x03: MBC1,
+    0x05: MBC2, 0x06: MBC2,
+    0x0F: MBC3, 0x10: MBC3, 0x11: MBC3, 0x12: MBC3, 0x13: MBC3,
+    0x19: MBC5, 0x1A: MBC5, 0x1B: MBC5, 0x1C: MBC5, 0x1D: MBC5, 0x1E: MBC5,
+}
@@ -1,3 +1,6 @@
+from enum import IntEnum
+from typing import List
+
 from gameboy.hardware.bus import Bus
 from gameboy.hardware.cartridge import Cartridge
 from gameboy.hardware.cpu import CPU
@@ -7,28 +10,126 @@ from gameboy.hardware.ppu import PPU
 from gameboy.hardware.ram import RAM
 from gameboy.hardware.timer import Timer
 
+"""
+Peripherals are not emulated along with the CPU, but caught up with it when
+they are accessed or when an event which may raise an interrupt is due. Each
+component tells the ticks until its next event, and the CPU runs freely until
+the nearest of the deadlines.
+"""
+
+
+class EventSource(IntEnum):
+    PPU = 0
+    TIMER = 1
+    DMA = 2
+    SERIAL = 3
+
+
+NEVER = 1 << 62
+# the CPU does not wait longer than a frame at once
+MAX_IDLE_TICKS = 456 * 154
+
 
 class Motherboard:
 
-    def __init__(self, gamerom: str):
+    def __init__(
+        self,
+        gamerom: str,
+        translate: bool = True,
+        precise: bool = False,
+        skip_idle: bool = True,
+        renderer: str = 'fifo',
+    ):
+        self.ticks = 0
+        # the peripherals have been emulated up to `synced`
+        self.synced = 0
+        self.syncing = False
+
         self.cartridge = Cartridge(filename=gamerom)
         self.ram = RAM()
         self.lcd = LCD()
-        self.ppu = PPU(motherboard=self)
+        self.ppu = PPU(motherboard=self, renderer=renderer)
         self.timer = Timer(motherboard=self)
         self.io = IO(motherboard=self)
         self.bus = Bus(motherboard=self)
-        self.cpu = CPU(motherboard=self)
+        self.cpu = CPU(
+            motherboard=self, translate=translate, precise=precise,
+            skip_idle=skip_idle,
+        )
 
-        self.ticks = 0
+        self.deadlines: List[int] = [NEVER] * len(EventSource)
+        self.next_deadline = NEVER
+        self.schedule()
 
     def tick(self):
         self.cpu.tick()
 
+    def close(self) -> None:
+        """Writes the battery-backed RAM back to the disk, unmaps the files."""
+        self.bus.close()
+        self.cartridge.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        self.close()
+
     def emulate(self, cycles: int):
-        for _ in range(cycles):
-            for _ in range(4):
-                self.ticks += 1
-                self.timer.tick()
-                self.ppu.tick()
-            self.io.dma.tick()
+        self.ticks += cycles * 4
+        if self.ticks >= self.next_deadline:
+            self.sync()
+
+    def fast_forward(self):
+        """
+        Emulates the M-cycles up to the next deadline at once, for the CPU
+        has nothing to do until then.
+        """
+        ticks = self.idle_deadline() - self.ticks
+        self.emulate(cycles=max(1, (ticks + 3) >> 2))
+
+    def idle_deadline(self) -> int:
+        """Returns the tick until which the CPU may wait for an event."""
+        return min(self.next_deadline, self.ticks + MAX_IDLE_TICKS)
+
+    def sync(self):
+        """Catches the peripherals up with the CPU."""
+        if self.synced == self.ticks or self.syncing:
+            return
+        self.syncing = True
+        elapsed = self.ticks - self.synced
+        ppu, dma = self.ppu, self.io.dma
+        # OAM is written by DMA and read by PPU, keep them in step. The bytes
+        # due before PPU reads OAM are copied at once, unless they are read
+        # from the registers.
+        while dma.active and self.synced < self.ticks:
+            cycles = 1
+            if self.bus.read_pages[dma.base] is not None:
+                cycles = min(
+                    self.ticks - self.synced >> 2, dma.pending(),
+                    ppu.next_oam_read() - 1 >> 2,
+                ) or 1
+            self.synced += cycles * 4
+            ppu.advance(cycles * 4)
+            dma.advance(cycles)
+        ticks = self.ticks - self.synced
+        if ticks:
+            self.synced = self.ticks
+            ppu.advance(ticks)
+        self.timer.update()
+        self.io.serial.advance(elapsed)
+        self.syncing = False
+        self.schedule()
+
+    def schedule(self):
+        """Collects the next event of each component."""
+        deadlines = self.deadlines
+        events = (
+            (EventSource.PPU, self.ppu.next_event()),
+            (EventSource.TIMER, self.timer.next_event()),
+            (EventSource.DMA, self.io.dma.next_event()),
+            (EventSource.SERIAL, self.io.serial.next_event()),
+        )
+        for source, delay in events:
+            deadlines[source] = NEVER if delay is None else self.synced + delay
+        self.next_deadline = min(deadlines)
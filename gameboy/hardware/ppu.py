@@ -1,11 +1,18 @@
 from array import array
 from collections import deque
 from enum import IntEnum, auto
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Optional, Union
 
-from gameboy.common import UnexpectedFallThrough, get_bit
+from gameboy.common import UnexpectedFallThrough
 from gameboy.core import InterruptType
+from gameboy.hardware.frame import convert
 from gameboy.hardware.lcd import InterruptSource, LCDMode
+from gameboy.hardware.tile_cache import TileCache
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is only required by `NumpyRenderer`
+    np = None  # type: ignore[assignment]
 
 if TYPE_CHECKING:
     from gameboy.hardware import Motherboard
@@ -15,6 +22,12 @@ LINES_PER_FRAME = 154
 TICKS_PER_LINE = 456
 Y_RESOLUTION = 144
 X_RESOLUTION = 160
+# the line ticks at which `PixelFIFO` ends mode 3, and the tiles it fetches
+# until then, by the fine scroll (SCX % 8)
+TRANSFER_ENDS = (297, 300, 301, 302, 303, 304, 305, 306)
+TILE_FETCHES = (22, 22, 22, 23, 23, 23, 23, 23)
+# the pixels of the fetched tiles, from the first one
+SPRITE_LINE_WIDTH = max(TILE_FETCHES) * 8
 
 
 class PixelFIFOState(IntEnum):
@@ -33,9 +46,7 @@ class PixelFIFO:
         self.pushed_x = 0
         self.fetch_x = 0
         self.bgw_fetch_data = array('B', [0] * 3)
-        self.fetch_entry_data = array('B', [0] * 6)
-        self.oam_fetch_data = array('B', [0] * 4 * 3)
-        self.fetched_oam = 0
+        self.fetched_sprites = False
         self.map_y = 0
         self.map_x = 0
         self.tile_y = 0
@@ -44,64 +55,6 @@ class PixelFIFO:
 
         self.ppu: 'PPU' = ppu
 
-    def fetch_sprite_color(self, bit: int, default_color: int, bg_index: int):
-        color = default_color
-        for index in range(self.fetched_oam):
-            _, x, _, attr = self.oam_fetch_data[index * 4: index * 4 + 4]
-            sprite_x = x + self.ppu.lcd.scroll_x % 8 - 8  # type: ignore
-            if sprite_x + 8 < self.fifo_x:
-                continue
-            offset = self.fifo_x - sprite_x
-            if offset < 0 or offset > 7:
-                continue
-            bit = offset if get_bit(attr, 5) else 7 - offset  # X Flip or not
-            lo = (self.fetch_entry_data[index * 2] >> bit) & 0x1
-            hi = (self.fetch_entry_data[index * 2 + 1] >> bit) & 0x1
-            sprite_index = (hi << 1) | lo
-            bg_priority = get_bit(attr, 7)
-            if not sprite_index:  # Transparent
-                continue
-            if not bg_priority or not bg_index:
-                palette = (
-                    self.ppu.lcd.obj1_colors  # type: ignore
-                    if get_bit(attr, 4) else
-                    self.ppu.lcd.obj0_colors  # type: ignore
-                )
-                color = palette[sprite_index]
-                if sprite_index:
-                    break
-        return color
-
-    def fetch_sprite_tile(self):
-        for index in range(self.ppu.oam_entry_count):
-            y, x, tile, attr = self.ppu.oam_entries[index * 4: index * 4 + 4]
-            sprite_x = x + self.ppu.lcd.scroll_x % 8 - 8
-            if (
-                self.fetch_x <= sprite_x < self.fetch_x + 8
-                or sprite_x < self.fetch_x <= sprite_x + 8
-            ):
-                self.oam_fetch_data[self.fetched_oam * 4 + 0] = y
-                self.oam_fetch_data[self.fetched_oam * 4 + 1] = x
-                self.oam_fetch_data[self.fetched_oam * 4 + 2] = tile
-                self.oam_fetch_data[self.fetched_oam * 4 + 3] = attr
-                self.fetched_oam += 1
-            if self.fetched_oam >= 3:
-                break
-
-    def fetch_sprite_data(self, offset: int):
-        sprite_height = self.ppu.lcd.lcdc_obj_height  # type: ignore
-        for index in range(self.fetched_oam):
-            y, _, tile, attr = self.oam_fetch_data[index * 4: index * 4 + 4]
-            tile_y = ((self.ppu.lcd.ly + 16 - y) * 2) & 0xFF  # type: ignore
-            if get_bit(attr, 6):  # Y Flip or not
-                tile_y = sprite_height * 2 - 2 - tile_y
-            if sprite_height == 16:
-                tile &= 0xFE
-            bus_read = self.ppu.motherboard.bus.read
-            self.fetch_entry_data[index * 2 + offset] = bus_read(
-                0x8000 + tile * 16 + tile_y + offset,
-            )
-
     def fetch_window_tile(self):
         if not self.ppu.window_visible():
             return
@@ -112,62 +65,73 @@ class PixelFIFO:
             and self.ppu.lcd.ly < self.ppu.lcd.window_y + X_RESOLUTION
         ):
             window_tile_y = self.ppu.window_line // 8
-            self.bgw_fetch_data[0] = self.ppu.motherboard.bus.read(
-                self.ppu.lcd.lcdc_win_map_area
+            self.bgw_fetch_data[0] = self.ppu.vram[
+                self.ppu.lcd.lcdc_win_map_area - 0x8000
                 + (self.fetch_x + 7 - self.ppu.lcd.window_x) // 8
-                + window_tile_y * 32,
-            )
+                + window_tile_y * 32
+            ]
             if self.ppu.lcd.lcdc_bgw_data_area == 0x8800:
                 self.bgw_fetch_data[0] = (self.bgw_fetch_data[0] + 0x80) & 0xFF
 
     def fetch(self):
         if self.state == PixelFIFOState.TILE:
-            self.fetched_oam = 0
             if self.ppu.lcd.lcdc_bgw_enable:
-                self.bgw_fetch_data[0] = self.ppu.motherboard.bus.read(
-                    self.ppu.lcd.lcdc_bg_map_area
+                self.bgw_fetch_data[0] = self.ppu.vram[
+                    self.ppu.lcd.lcdc_bg_map_area - 0x8000
                     + self.map_x // 8
-                    + self.map_y // 8 * 32,
-                )
+                    + self.map_y // 8 * 32
+                ]
                 if self.ppu.lcd.lcdc_bgw_data_area == 0x8800:
                     self.bgw_fetch_data[0] = (
                         self.bgw_fetch_data[0] + 0x80
                     ) & 0xFF
                 self.fetch_window_tile()
-            if self.ppu.lcd.lcdc_obj_enable and self.ppu.oam_entry_count:
-                self.fetch_sprite_tile()
+            # the sprites of the tile are drawn in `PPU.sprite_line`
+            self.fetched_sprites = bool(
+                self.ppu.lcd.lcdc_obj_enable and self.ppu.oam_entry_count
+            )
+            if (
+                self.fetched_sprites
+                and self.ppu.lcd.scroll_x % 8 != self.ppu.sprite_fine
+            ):
+                self.ppu.draw_sprites()
             self.state = PixelFIFOState.DATA0
             self.fetch_x = (self.fetch_x + 8) & 0xFF
         elif self.state == PixelFIFOState.DATA0:
-            self.bgw_fetch_data[1] = self.ppu.motherboard.bus.read(
-                self.ppu.lcd.lcdc_bgw_data_area
+            self.bgw_fetch_data[1] = self.ppu.vram[
+                self.ppu.lcd.lcdc_bgw_data_area - 0x8000
                 + self.bgw_fetch_data[0] * 16
-                + self.tile_y,
-            )
-            self.fetch_sprite_data(0)
+                + self.tile_y
+            ]
             self.state = PixelFIFOState.DATA1
         elif self.state == PixelFIFOState.DATA1:
-            self.bgw_fetch_data[2] = self.ppu.motherboard.bus.read(
-                self.ppu.lcd.lcdc_bgw_data_area
+            self.bgw_fetch_data[2] = self.ppu.vram[
+                self.ppu.lcd.lcdc_bgw_data_area - 0x8000
                 + self.bgw_fetch_data[0] * 16
-                + self.tile_y + 1,
-            )
-            self.fetch_sprite_data(1)
+                + self.tile_y + 1
+            ]
             self.state = PixelFIFOState.IDLE
         elif self.state == PixelFIFOState.IDLE:
             self.state = PixelFIFOState.PUSH
         elif self.state == PixelFIFOState.PUSH:
             if self.size <= 8:
                 if self.fetch_x + self.ppu.lcd.scroll_x % 8 >= 8:
+                    lcd = self.ppu.lcd
+                    sprites = lcd.lcdc_obj_enable and self.fetched_sprites
                     for bit in range(7, -1, -1):
                         lo = (self.bgw_fetch_data[1] >> bit) & 1
                         hi = (self.bgw_fetch_data[2] >> bit) & 1
                         index = (hi << 1) | lo
-                        color = self.ppu.lcd.bg_colors[index]
-                        if not self.ppu.lcd.lcdc_bgw_enable:
-                            color = self.ppu.lcd.bg_colors[0]
-                        if self.ppu.lcd.lcdc_obj_enable:
-                            color = self.fetch_sprite_color(bit, color, index)
+                        color = lcd.bg_colors[index]
+                        if not lcd.lcdc_bgw_enable:
+                            color = lcd.bg_colors[0]
+                        if sprites:
+                            sprite = (
+                                self.ppu.sprite_front_line if index
+                                else self.ppu.sprite_line
+                            )[self.fifo_x]
+                            if sprite:
+                                color = lcd.palettes[sprite >> 2][sprite & 0x3]
                         self.push(color)
                         self.fifo_x = (self.fifo_x + 1) & 0xFF
                 self.state = PixelFIFOState.TILE
@@ -202,22 +166,187 @@ class PixelFIFO:
         return self.fifo.popleft()
 
 
+class ScanlineRenderer:
+    """
+    Renders a whole line at the start of mode 3, from the registers at that
+    time. The output is the same as that of `PixelFIFO` as long as they do
+    not change during mode 3, which then ends after the same ticks.
+    """
+
+    def __init__(self, ppu: 'PPU'):
+        # the fetcher keeps the last tile while the background is off
+        self.tile = 0
+
+        self.ppu: 'PPU' = ppu
+
+    def render(self):
+        ppu = self.ppu
+        lcd = ppu.lcd
+        vram = ppu.vram
+        ly = lcd.ly
+        scroll_x = lcd.scroll_x
+        fine = scroll_x % 8
+        map_y = (ly + lcd.scroll_y) & 0xFF
+        bg_map = lcd.lcdc_bg_map_area - 0x8000 + map_y // 8 * 32
+        first_tile = (lcd.lcdc_bgw_data_area - 0x8000) >> 4
+        cache = ppu.tile_cache
+        pixels = cache.pixels
+        signed = 0x80 if lcd.lcdc_bgw_data_area == 0x8800 else 0
+        bgw_enable = lcd.lcdc_bgw_enable
+        window_x = lcd.window_x
+        window = (
+            bgw_enable and ppu.window_visible()
+            and lcd.window_y <= ly < lcd.window_y + X_RESOLUTION
+        )
+        win_map = lcd.lcdc_win_map_area - 0x8000 + ppu.window_line // 8 * 32
+        colors = lcd.bg_colors
+        sprites = lcd.lcdc_obj_enable and ppu.oam_entry_count
+        back = ppu.sprite_line
+        front = ppu.sprite_front_line
+        palettes = lcd.palettes
+        buffer = ppu.video_buffer
+        base = ly * X_RESOLUTION - fine
+        tile = self.tile
+        for fetch_x in range(0, TILE_FETCHES[fine] * 8, 8):
+            if bgw_enable:
+                tile = (vram[bg_map + ((fetch_x + scroll_x) & 0xFF) // 8]
+                        + signed) & 0xFF
+                if window and window_x <= fetch_x + 7 < window_x + 158:
+                    tile = (vram[win_map + (fetch_x + 7 - window_x) // 8]
+                            + signed) & 0xFF
+            start = cache.row(first_tile + tile, map_y % 8)
+            indices = pixels[start:start + 8]
+            for offset in range(8):
+                if not 0 <= fetch_x + offset - fine < X_RESOLUTION:
+                    continue
+                index = indices[offset]
+                color = colors[index if bgw_enable else 0]
+                if sprites:
+                    sprite = (front if index else back)[fetch_x + offset]
+                    if sprite:
+                        color = palettes[sprite >> 2][sprite & 0x3]
+                buffer[base + fetch_x + offset] = color
+        self.tile = tile
+
+
+class NumpyRenderer(ScanlineRenderer):
+    """
+    Renders the background and the window of a line with NumPy, straight
+    from VRAM, and mixes the sprite line buffers over them.
+    """
+
+    def __init__(self, ppu: 'PPU'):
+        if np is None:
+            raise ImportError(
+                'the numpy renderer requires NumPy, install gameboy[numpy]',
+            )
+        super().__init__(ppu=ppu)
+        self.vram = np.frombuffer(ppu.vram, dtype=np.uint8)
+        self.video_buffer = np.frombuffer(ppu.video_buffer, dtype=np.uint8)
+        self.sprite_line = np.frombuffer(ppu.sprite_line, dtype=np.uint8)
+        self.sprite_front_line = np.frombuffer(
+            ppu.sprite_front_line, dtype=np.uint8,
+        )
+        self.fetches = np.arange(0, max(TILE_FETCHES) * 8, 8)
+        # bit 7 - x of both bytes of a tile row is pixel x
+        self.shifts = np.arange(7, -1, -1, dtype=np.uint8)
+
+    def render(self):
+        ppu = self.ppu
+        lcd = ppu.lcd
+        vram = self.vram
+        ly = lcd.ly
+        scroll_x = lcd.scroll_x
+        fine = scroll_x % 8
+        map_y = (ly + lcd.scroll_y) & 0xFF
+        signed = 0x80 if lcd.lcdc_bgw_data_area == 0x8800 else 0
+        bgw_enable = lcd.lcdc_bgw_enable
+        fetches = self.fetches[:TILE_FETCHES[fine]]
+        if bgw_enable:
+            bg_map = lcd.lcdc_bg_map_area - 0x8000 + map_y // 8 * 32
+            tiles = vram[bg_map + ((fetches + scroll_x) & 0xFF) // 8]
+            window_x = lcd.window_x
+            if (
+                ppu.window_visible()
+                and lcd.window_y <= ly < lcd.window_y + X_RESOLUTION
+            ):
+                win_map = (
+                    lcd.lcdc_win_map_area - 0x8000 + ppu.window_line // 8 * 32
+                )
+                inside = (
+                    (window_x <= fetches + 7) & (fetches + 7 < window_x + 158)
+                )
+                columns = np.maximum(fetches + 7 - window_x, 0) // 8
+                tiles = np.where(inside, vram[win_map + columns], tiles)
+            tiles = (tiles.astype(np.intp) + signed) & 0xFF
+            self.tile = int(tiles[-1])
+        else:
+            tiles = np.full(len(fetches), self.tile, dtype=np.intp)
+        rows = (
+            lcd.lcdc_bgw_data_area - 0x8000 + tiles * 16 + map_y % 8 * 2
+        )[:, None]
+        lo = vram[rows] >> self.shifts & 0x1
+        hi = vram[rows + 1] >> self.shifts & 0x1
+        indices = (lo | hi << 1).ravel()[fine:fine + X_RESOLUTION]
+        base = ly * X_RESOLUTION
+        line = self.video_buffer[base:base + X_RESOLUTION]
+        colors = np.array(lcd.bg_colors, dtype=np.uint8)
+        line[:] = colors[indices] if bgw_enable else colors[0]
+        if not lcd.lcdc_obj_enable or not ppu.oam_entry_count:
+            return
+        sprites = np.where(
+            indices,
+            self.sprite_front_line[fine:fine + X_RESOLUTION],
+            self.sprite_line[fine:fine + X_RESOLUTION],
+        )
+        drawn = sprites != 0
+        palettes = np.array(
+            [color for palette in lcd.palettes for color in palette],
+            dtype=np.uint8,
+        )
+        line[drawn] = palettes[sprites[drawn]]
+
+
+RENDERERS = {
+    'fifo': None,
+    'scanline': ScanlineRenderer,
+    'numpy': NumpyRenderer,
+}
+
+
 class PPU:
 
-    def __init__(self, motherboard: 'Motherboard'):
+    def __init__(self, motherboard: 'Motherboard', renderer: str = 'fifo'):
         self.vram = array('B', [0] * 0x2000)
         self.oam = array('B', [0] * 0xA0)
         self.oam_entries = array('B', [0] * 4 * 10)
         self.oam_entry_count = 0
+        # the palette (1 or 2) << 2 | the color index of the sprite pixels,
+        # see `draw_sprites`
+        self.sprite_line = bytearray(SPRITE_LINE_WIDTH)
+        self.sprite_front_line = bytearray(SPRITE_LINE_WIDTH)
+        # sprites are placed from the first fetched tile, by SCX % 8
+        self.sprite_fine = 0
         self.current_frame = 0
         self.line_ticks = 0
         self.window_line = 0
-        self.video_buffer = array('I', [0] * Y_RESOLUTION * X_RESOLUTION)
+        # the pixels of the frame, see `frame`
+        self.video_buffer = bytearray(Y_RESOLUTION * X_RESOLUTION)
+        self.tile_cache = TileCache(vram=self.vram)
 
         self.motherboard = motherboard
         self.lcd = motherboard.lcd
         self.lcd.lcds_mode = LCDMode.OAM_SCAN
         self.pixel_fifo = PixelFIFO(ppu=self)
+        # lines are rendered by the pixel FIFO dot by dot, unless a renderer
+        # renders them at once
+        if renderer not in RENDERERS:
+            raise UnexpectedFallThrough(f'renderer: {renderer}')
+        renderer_type = RENDERERS[renderer]
+        self.renderer = None if renderer_type is None else renderer_type(
+            ppu=self,
+        )
+        self.transfer_end = 0
 
     def tick(self):
         self.line_ticks += 1
@@ -232,6 +361,87 @@ class PPU:
             return self.tick_transferring()
         raise UnexpectedFallThrough
 
+    def advance(self, ticks: int):
+        if not self.lcd.lcdc_lcd_enable:
+            return
+        while ticks > 0:
+            lcds_mode = self.lcd.lcds_mode
+            if lcds_mode == LCDMode.TRANSFERRING:
+                if self.renderer is None:
+                    self.tick()
+                    ticks -= 1
+                    continue
+                until = self.transfer_end
+            # nothing happens between the checks of the other modes
+            elif lcds_mode != LCDMode.OAM_SCAN:
+                until = TICKS_PER_LINE
+            elif self.line_ticks < 1:
+                until = 1
+            else:
+                until = 80
+            idle = min(ticks, until - self.line_ticks) - 1
+            if idle > 0:
+                self.line_ticks += idle
+                ticks -= idle
+            self.tick()
+            ticks -= 1
+
+    def next_event(self) -> Optional[int]:
+        """Returns the ticks until the mode may change."""
+        if not self.lcd.lcdc_lcd_enable:
+            return None
+        lcds_mode = self.lcd.lcds_mode
+        if lcds_mode == LCDMode.TRANSFERRING:
+            if self.renderer is not None:
+                return max(1, self.transfer_end - self.line_ticks)
+            # at most one pixel is pushed per tick
+            return max(1, X_RESOLUTION - self.pixel_fifo.pushed_x)
+        elif lcds_mode == LCDMode.OAM_SCAN:
+            return max(1, 80 - self.line_ticks)
+        return max(1, TICKS_PER_LINE - self.line_ticks)
+
+    def oam_blocked(self) -> bool:
+        """Whether OAM is in use (modes 2 and 3) and blocked for the CPU."""
+        return self.lcd.lcdc_lcd_enable and self.lcd.lcds_mode in (
+            LCDMode.OAM_SCAN, LCDMode.TRANSFERRING,
+        )
+
+    def next_oam_read(self) -> int:
+        """Returns the least number of ticks until the tick reading OAM."""
+        if not self.lcd.lcdc_lcd_enable:
+            # switching the LCD on syncs first
+            return 1 << 62
+        if self.lcd.lcds_mode == LCDMode.OAM_SCAN and self.line_ticks < 1:
+            return 1 - self.line_ticks
+        return TICKS_PER_LINE - self.line_ticks + 1
+
+    def write_control(self, value: int) -> None:
+        """
+        While the LCD is off, the PPU stays at the start of line 0 in mode 0
+        and is not advanced. Switching it on starts the first line again.
+        """
+        enabled = self.lcd.lcdc_lcd_enable
+        self.lcd.write_control(value=value)
+        if enabled == self.lcd.lcdc_lcd_enable:
+            return
+        self.lcd.ly = 0
+        self.line_ticks = 0
+        self.window_line = 0
+        self.pixel_fifo.clear()
+        if self.lcd.lcdc_lcd_enable:
+            self.lcd.lcds_mode = LCDMode.OAM_SCAN
+            self.lcd.lcds_lyc = self.lcd.ly == self.lcd.ly_compare
+        else:
+            self.lcd.lcds_mode = LCDMode.HBLANK
+            self.motherboard.bus.block_vram(blocked=False)
+
+    def frame(self, format: str = 'argb') -> Union[bytes, 'array[int]']:
+        """
+        Returns the pixels of the frame as ARGB (`array('I')`), RGB565
+        (`array('H')`), grayscale (`bytes`) or raw (`bytes`) pixels.
+        """
+        return convert(pixels=self.video_buffer, format=format)
+
     def request_interrupt(self, int_type: InterruptType):
         self.motherboard.cpu.request_interrupt(int_type)
 
@@ -258,29 +468,70 @@ class PPU:
         )
 
     def load_sprites(self):
-        ly = self.lcd.ly
+        ly = self.lcd.ly + 16
         sprite_height = self.lcd.lcdc_obj_height
-        for index in range(40):
-            y, x, tile, attr = self.oam[index * 4:index * 4 + 4]
-            if not x:  # Not visible sprite
-                continue
-            if self.oam_entry_count >= 10:  # 10 sprites per line at most
-                break
-            if y <= ly + 16 and y + sprite_height > ly + 16:
-                self.oam_entries[self.oam_entry_count * 4 + 0] = y
-                self.oam_entries[self.oam_entry_count * 4 + 1] = x
-                self.oam_entries[self.oam_entry_count * 4 + 2] = tile
-                self.oam_entries[self.oam_entry_count * 4 + 3] = attr
-                self.oam_entry_count += 1
+        oam = self.oam
+        selected = []
+        for index in range(0, 0xA0, 4):
+            y = oam[index]
+            # sprites at x = 0 are not visible
+            if oam[index + 1] and y <= ly < y + sprite_height:
+                selected.append(index)
+                if len(selected) >= 10:  # 10 sprites per line at most
+                    break
         # sort the entries according to x ascent
-        entries = list(range(self.oam_entry_count))
-        entries.sort(key=lambda idx: self.oam_entries[idx * 4 + 1])
-        new_entries = array('B', [0] * 4 * self.oam_entry_count)
-        for new_index, old_index in enumerate(entries):
-            new_entries[new_index * 4: new_index * 4 + 4] = self.oam_entries[
-                old_index * 4: old_index * 4 + 4
-            ]
-        self.oam_entries[:self.oam_entry_count * 4] = new_entries
+        selected.sort(key=lambda index: oam[index + 1])
+        for entry, index in enumerate(selected):
+            self.oam_entries[entry * 4:entry * 4 + 4] = oam[index:index + 4]
+        self.oam_entry_count = len(selected)
+
+    def draw_sprites(self):
+        """
+        Draws the sprites of the line into `sprite_line`, the pixels shown
+        over the background color 0, and into `sprite_front_line`, those
+        shown over the other colors. Like `PixelFIFO`, the first sprite with
+        an opaque pixel is shown, sprites behind the background are skipped
+        over the other colors, and at most 3 sprites are fetched per tile.
+        """
+        back = self.sprite_line
+        front = self.sprite_front_line
+        back[:] = front[:] = bytes(SPRITE_LINE_WIDTH)
+        lcd = self.lcd
+        fine = self.sprite_fine = lcd.scroll_x % 8
+        if not self.oam_entry_count:
+            return
+        cache = self.tile_cache
+        sprite_height = lcd.lcdc_obj_height
+        sprites = []
+        for index in range(0, self.oam_entry_count * 4, 4):
+            y, x, tile, attr = self.oam_entries[index:index + 4]
+            tile_y = ((lcd.ly + 16 - y) * 2) & 0xFF
+            if attr & 0x40:  # Y Flip
+                tile_y = sprite_height * 2 - 2 - tile_y
+            if sprite_height == 16:
+                tile &= 0xFE
+            start = cache.row(tile + (tile_y >> 4), (tile_y >> 1) & 0x7)
+            indices = bytes(cache.pixels[start:start + 8])
+            if attr & 0x20:  # X Flip
+                indices = indices[::-1]
+            palette = 0x8 if attr & 0x10 else 0x4
+            sprites.append((x + fine - 8, attr, indices, palette))
+        for fetch_x in range(0, TILE_FETCHES[fine] * 8, 8):
+            fetched = [
+                sprite for sprite in sprites
+                if fetch_x <= sprite[0] < fetch_x + 8
+                or sprite[0] < fetch_x <= sprite[0] + 8
+            ][:3]
+            # the first sprites are drawn last, over the others
+            for sprite_x, attr, indices, palette in reversed(fetched):
+                first = max(fetch_x, sprite_x)
+                for x in range(first, min(fetch_x, sprite_x) + 8):
+                    index = indices[x - sprite_x]
+                    if not index:  # Transparent
+                        continue
+                    back[x] = palette | index
+                    if not attr & 0x80:
+                        front[x] = palette | index
 
     def tick_hblank(self):
         if self.line_ticks >= TICKS_PER_LINE:
@@ -307,20 +558,29 @@ class PPU:
     def tick_oam_scan(self):
         if self.line_ticks >= 80:
             self.lcd.lcds_mode = LCDMode.TRANSFERRING
+            self.motherboard.bus.block_vram(blocked=self.lcd.lcdc_lcd_enable)
+            self.draw_sprites()
+            if self.renderer is not None:
+                self.renderer.render()
+                self.transfer_end = TRANSFER_ENDS[self.lcd.scroll_x % 8]
             self.pixel_fifo.state = PixelFIFOState.TILE
             self.pixel_fifo.line_x = 0
             self.pixel_fifo.fetch_x = 0
             self.pixel_fifo.pushed_x = 0
             self.pixel_fifo.fifo_x = 0
         if self.line_ticks == 1:
-            self.oam_entry_count = 0
             self.load_sprites()
 
     def tick_transferring(self):
-        self.pixel_fifo.process()
-        if self.pixel_fifo.pushed_x >= X_RESOLUTION:
+        if self.renderer is not None:
+            done = self.line_ticks >= self.transfer_end
+        else:
+            self.pixel_fifo.process()
+            done = self.pixel_fifo.pushed_x >= X_RESOLUTION
+        if done:
             self.pixel_fifo.clear()
             self.lcd.lcds_mode = LCDMode.HBLANK
+            self.motherboard.bus.block_vram(blocked=False)
             if self.lcd.lcds_stat_int(InterruptSource.HBLANK):
                 self.request_interrupt(InterruptType.LCD_STAT)
 
@@ -334,6 +594,8 @@ class PPU:
     def write(self, address: int, value: int) -> None:
         if 0x8000 <= address <= 0x9FFF:
             self.vram[address - 0x8000] = value
+            if address <= 0x97FF:
+                self.tile_cache.invalidate(address=address)
             return
         elif 0xFE00 <= address <= 0xFE9F:
             self.oam[address - 0xFE00] = value
@@ -0,0 +1,138 @@
+from array import array
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Tuple
+
+"""
+The profiler counts the bus accesses per page, and per address for the page
+of the I/O registers and the high RAM. Every `interval`-th access is sampled
+for the histogram of the hottest addresses. The bus only maps its pages to
+the counting handlers while profiling, see `Bus.start_profiling`.
+"""
+
+REGIONS = (
+    ('ROM bank 0', 0x0000, 0x3FFF),
+    ('ROM bank N', 0x4000, 0x7FFF),
+    ('VRAM', 0x8000, 0x9FFF),
+    ('Cartridge RAM', 0xA000, 0xBFFF),
+    ('WRAM', 0xC000, 0xDFFF),
+    ('Echo RAM', 0xE000, 0xFDFF),
+    ('OAM', 0xFE00, 0xFEFF),
+    ('I/O', 0xFF00, 0xFF7F),
+    ('HRAM', 0xFF80, 0xFFFE),
+    ('IE', 0xFFFF, 0xFFFF),
+)
+IO_REGISTERS = {
+    0xFF00: 'P1', 0xFF01: 'SB', 0xFF02: 'SC', 0xFF04: 'DIV', 0xFF05: 'TIMA',
+    0xFF06: 'TMA', 0xFF07: 'TAC', 0xFF0F: 'IF', 0xFF40: 'LCDC',
+    0xFF41: 'STAT', 0xFF42: 'SCY', 0xFF43: 'SCX', 0xFF44: 'LY', 0xFF45: 'LYC',
+    0xFF46: 'DMA', 0xFF47: 'BGP', 0xFF48: 'OBP0', 0xFF49: 'OBP1',
+    0xFF4A: 'WY', 0xFF4B: 'WX',
+}
+SAMPLE_INTERVAL = 64
+
+
+class BusProfiler:
+
+    def __init__(self, interval: int = SAMPLE_INTERVAL):
+        self.interval = interval
+        self.countdown = interval
+        self.page_reads = array('Q', bytes(8 * 0x100))
+        self.page_writes = array('Q', bytes(8 * 0x100))
+        self.high_reads = array('Q', bytes(8 * 0x100))
+        self.high_writes = array('Q', bytes(8 * 0x100))
+        self.samples: Counter = Counter()
+
+    def sample(self, address: int) -> None:
+        self.countdown = self.interval
+        self.samples[address] += 1
+
+    def counted_read(
+        self,
+        index: int,
+        page: Optional[memoryview],
+        handler: Callable[[int], int],
+    ) -> Callable[[int], int]:
+        reads = self.page_reads
+        high_reads = self.high_reads
+
+        def read(address: int) -> int:
+            reads[index] += 1
+            if index == 0xFF:
+                high_reads[address & 0xFF] += 1
+            self.countdown -= 1
+            if not self.countdown:
+                self.sample(address)
+            if page is not None:
+                return page[address & 0xFF]
+            return handler(address)
+
+        return read
+
+    def counted_write(
+        self,
+        index: int,
+        page: Optional[memoryview],
+        handler: Callable[[int, int], None],
+    ) -> Callable[[int, int], None]:
+        writes = self.page_writes
+        high_writes = self.high_writes
+
+        def write(address: int, value: int) -> None:
+            writes[index] += 1
+            if index == 0xFF:
+                high_writes[address & 0xFF] += 1
+            self.countdown -= 1
+            if not self.countdown:
+                self.sample(address)
+            if page is not None:
+                page[address & 0xFF] = value
+                return
+            return handler(address, value)
+
+        return write
+
+    def count(self, first: int, last: int) -> Tuple[int, int]:
+        """Returns the reads and the writes of the addresses."""
+        if first >> 8 == 0xFF:
+            lo, hi = first & 0xFF, (last & 0xFF) + 1
+            return sum(self.high_reads[lo:hi]), sum(self.high_writes[lo:hi])
+        lo, hi = first >> 8, (last >> 8) + 1
+        return sum(self.page_reads[lo:hi]), sum(self.page_writes[lo:hi])
+
+    def regions(self) -> Dict[str, Tuple[int, int]]:
+        return {
+            name: self.count(first=first, last=last)
+            for name, first, last in REGIONS
+        }
+
+    def io_registers(self) -> Dict[int, Tuple[int, int]]:
+        """Returns the reads and the writes of the accessed registers."""
+        registers = {}
+        for offset in range(0x80):
+            reads, writes = self.high_reads[offset], self.high_writes[offset]
+            if reads or writes:
+                registers[0xFF00 | offset] = (reads, writes)
+        return registers
+
+    def hottest(self, count: int = 10) -> List[Tuple[int, int]]:
+        """Returns the hottest addresses with their estimated accesses."""
+        return [
+            (address, samples * self.interval)
+            for address, samples in self.samples.most_common(count)
+        ]
+
+    def report(self, count: int = 10) -> str:
+        lines = [f'{"region":<16}{"reads":>14}{"writes":>14}']
+        for name, (reads, writes) in self.regions().items():
+            lines.append(f'{name:<16}{reads:>14}{writes:>14}')
+        lines += ['', f'{"register":<16}{"reads":>14}{"writes":>14}']
+        for address, (reads, writes) in self.io_registers().items():
+            name = IO_REGISTERS.get(address, '')
+            lines.append(
+                f'{address:04X} {name:<11}{reads:>14}{writes:>14}',
+            )
+        # the accesses of the addresses are estimated from the samples
+        lines += ['', f'{"address":<16}{"accesses":>14}']
+        for address, accesses in self.hottest(count=count):
+            lines.append(f'{address:04X}{accesses:>26}')
+        return '\n'.join(lines)
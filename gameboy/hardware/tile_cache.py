@@ -0,0 +1,49 @@
+from array import array
+
+"""
+The 384 tiles of VRAM are kept decoded, 64 color indices per tile, row by
+row and from left to right. A tile is decoded again when it is used after
+any write to its bytes, see `PPU.write`.
+"""
+
+TILE_COUNT = 384
+
+
+def spread(value: int) -> int:
+    """Moves bit 7 - x of `value` to the lowest bit of byte x (big endian)."""
+    result = 0
+    for x in range(8):
+        result |= ((value >> (7 - x)) & 0x1) << ((7 - x) * 8)
+    return result
+
+
+SPREAD = [spread(value) for value in range(0x100)]
+
+
+class TileCache:
+
+    def __init__(self, vram: 'array[int]'):
+        self.vram = vram
+        self.pixels = bytearray(TILE_COUNT * 64)
+        self.dirty = bytearray(b'\x01' * TILE_COUNT)
+
+    def invalidate(self, address: int) -> None:
+        """Marks the tile at `address` (0x8000 - 0x97FF) as dirty."""
+        self.dirty[(address - 0x8000) >> 4] = 1
+
+    def decode(self, tile: int) -> None:
+        vram = self.vram
+        for row in range(8):
+            lo = vram[tile * 16 + row * 2]
+            hi = vram[tile * 16 + row * 2 + 1]
+            start = tile * 64 + row * 8
+            self.pixels[start:start + 8] = (
+                SPREAD[lo] | SPREAD[hi] << 1
+            ).to_bytes(8, 'big')
+        self.dirty[tile] = 0
+
+    def row(self, tile: int, row: int) -> int:
+        """Returns the offset of a row of a tile in `pixels`."""
+        if self.dirty[tile]:
+            self.decode(tile)
+        return tile * 64 + row * 8
@@ -1,4 +1,4 @@
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Optional
 
 from gameboy.common import UnexpectedFallThrough, get_hi
 from gameboy.core import InterruptType
@@ -6,42 +6,75 @@ from gameboy.core import InterruptType
 if TYPE_CHECKING:
     from gameboy.hardware import Motherboard
 
-inc_period = {
-    0: 1 << 9,
-    1: 1 << 3,
-    2: 1 << 5,
-    3: 1 << 7,
-}
+"""
+The timer is not ticked. DIV is derived from the ticks of the motherboard,
+and TIMA is brought up to date from the time of its last update whenever it
+is accessed or may overflow.
+"""
+
+# TIMA is incremented on the falling edges of DIV bit 9, 3, 5 or 7, that is
+# once per `1 << shift` ticks
+inc_shift = (10, 4, 6, 8)
 
 
 class Timer:
 
     def __init__(self, motherboard: 'Motherboard'):
-        self.div = 0xAC00
+        # DIV is `(ticks + div_offset) & 0xFFFF`
+        self.div_offset = 0xAC00
         self.tima = 0
         self.tma = 0
         self.tac = 0
+        # TIMA is up to date at `updated` ticks
+        self.updated = 0
 
         self.motherboard = motherboard
 
-    def tick(self):
-        prev_div = self.div
-        self.div = (self.div + 1) & 0xFFFF
-        # determine whether to update according to increment cycles
-        clock_select = self.tac & 0b11
-        period = inc_period[clock_select]
-        should_update = bool(prev_div & period) and not bool(self.div & period)
-        enabled = bool(self.tac & (1 << 2))
-        # update
-        if should_update and enabled:
-            self.tima += 1
+    @property
+    def div(self) -> int:
+        return (self.motherboard.synced + self.div_offset) & 0xFFFF
+
+    @div.setter
+    def div(self, new_value: int):
+        self.update()
+        self.div_offset = new_value - self.motherboard.synced
+
+    def update(self):
+        now = self.motherboard.synced
+        then = self.updated
+        if now == then:
+            return
+        self.updated = now
+        if not self.tac & (1 << 2):
+            return
+        shift = inc_shift[self.tac & 0b11]
+        edges = (
+            (now + self.div_offset) >> shift
+        ) - ((then + self.div_offset) >> shift)
+        while edges:
+            if self.tima >= 0xFF:
+                self.tima += edges
+                return
+            step = min(edges, 0xFF - self.tima)
+            self.tima += step
+            edges -= step
             if self.tima == 0xFF:
                 self.tima = self.tma
                 self.motherboard.cpu.request_interrupt(InterruptType.TIMER)
 
+    def next_event(self) -> Optional[int]:
+        """Returns the ticks until TIMA overflows."""
+        if not self.tac & (1 << 2) or self.tima >= 0xFF:
+            return None
+        shift = inc_shift[self.tac & 0b11]
+        span = 1 << shift
+        counter = self.updated + self.div_offset
+        return span - (counter & (span - 1)) + ((0xFE - self.tima) << shift)
+
     def write(self, address: int, value: int):
+        self.update()
         if address == 0xFF04:
-            self.div = 0
+            self.div_offset = -self.updated
             return
         elif address == 0xFF05:
             self.tima = value
@@ -58,6 +91,7 @@ class Timer:
         if address == 0xFF04:
             return get_hi(self.div)
         elif address == 0xFF05:
+            self.update()
             return self.tima
         elif address == 0xFF06:
             return self.tma
@@ -53,21 +53,17 @@ class DebuggingTileView(BaseSDL2Window):
         return super().after_tick()
 
     def display_tiles(self):
-        base_addr = 0x8000
+        cache = self.motherboard.ppu.tile_cache
         rect = sdl2.SDL_Rect()
         for row in range(self.rows):
             for col in range(self.columns):
                 tile_idx = row * self.columns + col
-                for y in range(0, 16, 2):
-                    addr = base_addr + tile_idx * 16 + y
-                    b0 = self.motherboard.bus.read(addr)
-                    b1 = self.motherboard.bus.read(addr + 1)
-                    for bit in range(7, -1, -1):
-                        hi = int(bool(b0 & (1 << bit)))
-                        lo = int(bool(b1 & (1 << bit)))
-                        color = self.palette[(hi << 1) | lo]
-                        rect.x = (col * self.stride + 7 - bit) * self.scale
-                        rect.y = (row * self.stride + y // 2) * self.scale
+                for y in range(8):
+                    start = cache.row(tile_idx, y)
+                    for x, index in enumerate(cache.pixels[start:start + 8]):
+                        color = self.palette[index]
+                        rect.x = (col * self.stride + x) * self.scale
+                        rect.y = (row * self.stride + y) * self.scale
                         rect.w = self.scale
                         rect.h = self.scale
                         sdl2.SDL_FillRect(self.surface, rect, color)
@@ -119,6 +115,11 @@ class DebuggingMemoryView(BaseSDL2Window):
 
     def update_text_buffer(self):
         self.prev_buffer = self.text_buffer[:]
+        # the rows past the end of the address space are blank
+        data = self.motherboard.bus.read_block(
+            address=self.base_addr,
+            length=min(24 * 16, 0x10000 - self.base_addr),
+        )
         for row in range(24):
             row_base = self.base_addr + row * 16
             if row_base >= 0x10000:
@@ -127,8 +128,7 @@ class DebuggingMemoryView(BaseSDL2Window):
             self.text_buffer[row + 1] = (
                 f'0x{self.base_addr + row * 16:04X}  '
                 + ' '.join([
-                    f'{self.motherboard.bus.read(row_base + offset):02X}'
-                    for offset in range(16)
+                    f'{value:02X}' for value in data[row * 16:row * 16 + 16]
                 ])
             )
 
@@ -148,7 +148,7 @@ class GameSDL2Window(BaseSDL2Window):
         return super().after_tick()
 
     def render(self):
-        video_buffer = self.motherboard.ppu.video_buffer
+        frame = self.motherboard.ppu.frame(format='argb')
         for row in range(self.height):
             for col in range(self.width):
                 rect = sdl2.SDL_Rect(
@@ -160,7 +160,7 @@ class GameSDL2Window(BaseSDL2Window):
                 sdl2.SDL_FillRect(
                     self.surface,
                     rect,
-                    video_buffer[col + row * X_RESOLUTION],
+                    frame[col + row * X_RESOLUTION],
                 )
 
     def clear(self):
@@ -0,0 +1,39 @@
+from typing import Callable, Dict, Optional
+
+import pytest
+
+from gameboy.hardware import Motherboard
+
+
+@pytest.fixture
+def make_rom(tmp_path) -> Callable[..., str]:
+    """Builds a ROM which runs `code` from 0x0150."""
+
+    def make(
+        code: bytes,
+        cart_type: int = 0x00,
+        rom_size: int = 0x00,
+        ram_size: int = 0x00,
+        banks: Optional[Dict[int, bytes]] = None,
+    ) -> str:
+        data = bytearray(0x8000 << rom_size)
+        data[0x0100:0x0104] = bytes([0x00, 0xC3, 0x50, 0x01])  # JP 0x0150
+        data[0x0147] = cart_type
+        data[0x0148] = rom_size
+        data[0x0149] = ram_size
+        data[0x0150:0x0150 + len(code)] = code
+        for bank, content in (banks or {}).items():
+            data[bank * 0x4000:bank * 0x4000 + len(content)] = content
+        path = tmp_path / 'test.gb'
+        path.write_bytes(bytes(data))
+        return str(path)
+
+    return make
+
+
+def run_until_halt(motherboard: Motherboard, limit: int = 100000) -> None:
+    for _ in range(limit):
+        if motherboard.cpu.halted:
+            return
+        motherboard.tick()
+    raise AssertionError('the cpu did not halt')
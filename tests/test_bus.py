@@ -0,0 +1,141 @@
+import pytest
+
+from gameboy.hardware import Motherboard
+
+from .conftest import run_until_halt
+
+
+@pytest.mark.parametrize('translate', [False, True])
+def test_watch_reports_instruction_pc(make_rom, translate):
+    rom = make_rom(bytes([
+        0x00, 0x00,  # 0x0150: NOP; NOP
+        0x3E, 0x12,  # 0x0152: LD A,0x12
+        0xEA, 0x00, 0xC0,  # 0x0154: LD (0xC000),A
+        0x21, 0x00, 0xC0,  # 0x0157: LD HL,0xC000
+        0xCB, 0xC6,  # 0x015A: SET 0,(HL)
+        0x76,  # 0x015C: HALT
+    ]))
+    motherboard = Motherboard(gamerom=rom, translate=translate)
+    accesses = []
+    motherboard.bus.watch(
+        0xC000,
+        on_read=lambda *args: accesses.append(('read', *args[:3])),
+        on_write=lambda *args: accesses.append(('write', *args[:3])),
+    )
+    run_until_halt(motherboard)
+    assert accesses == [
+        ('write', 0xC000, 0x12, 0x0154),
+        ('read', 0xC000, 0x12, 0x015A),
+        ('write', 0xC000, 0x13, 0x015A),
+    ]
+
+
+def test_watch_reports_no_pc_for_interrupts(make_rom):
+    rom = make_rom(bytes([
+        0x31, 0x00, 0xD0,  # LD SP,0xD000
+        0x3E, 0x04,  # LD A,0x04
+        0xE0, 0xFF,  # LDH (0xFF),A
+        0xE0, 0x0F,  # LDH (0x0F),A
+        0xFB, 0x00,  # EI; NOP
+    ]))
+    motherboard = Motherboard(gamerom=rom)
+    accesses = []
+    motherboard.bus.watch(
+        0xCFFE, 0xCFFF,
+        on_write=lambda *args: accesses.append(args[:3]),
+    )
+    for _ in range(10):
+        motherboard.tick()
+        if motherboard.cpu.pc == 0x0050:
+            break
+    assert accesses == [(0xCFFF, 0x01, None), (0xCFFE, 0x5B, None)]
+
+
+def test_watch_reports_no_pc_for_dma(make_rom):
+    rom = make_rom(bytes([
+        0x3E, 0xC0,  # LD A,0xC0
+        0xE0, 0x46,  # LDH (0x46),A
+    ]))
+    motherboard = Motherboard(gamerom=rom)
+    accesses = []
+    motherboard.bus.watch(
+        0xC000, on_read=lambda *args: accesses.append(args[:3]),
+    )
+    for _ in range(0x100):
+        motherboard.tick()
+    assert accesses == [(0xC000, 0x00, None)]
+
+
+@pytest.mark.parametrize('cart_type, register', [
+    (0x01, 0x2000), (0x05, 0x2100), (0x11, 0x2000), (0x19, 0x2000),
+], ids=['mbc1', 'mbc2', 'mbc3', 'mbc5'])
+def test_rom_bank_pages(make_rom, cart_type, register):
+    rom = make_rom(
+        b'', cart_type=cart_type, rom_size=0x02,
+        banks={bank: bytes([bank]) * 0x4000 for bank in range(1, 8)},
+    )
+    bus = Motherboard(gamerom=rom).bus
+    # the pages of the banks are cached, and mapped again when switching back
+    for bank in (2, 1, 3, 2, 7, 1):
+        bus.write(register, bank)
+        assert bus.read_pages[0x40] is not None
+        assert bus.read(0x4000) == bus.read(0x7FFF) == bank
+        assert bus.read_block(0x7F00, 0x100) == bytes([bank]) * 0x100
+
+
+@pytest.mark.parametrize('cart_type, setup', [
+    (0x02, [(0x6000, 0x01)]), (0x12, []), (0x1A, []),
+], ids=['mbc1', 'mbc3', 'mbc5'])
+def test_ram_bank_pages(make_rom, cart_type, setup):
+    rom = make_rom(b'', cart_type=cart_type, ram_size=0x03)
+    bus = Motherboard(gamerom=rom).bus
+    for address, value in [(0x0000, 0x0A), *setup]:
+        bus.write(address, value)
+    for bank in range(4):
+        bus.write(0x4000, bank)
+        bus.write(0xA000, 0x10 + bank)
+        bus.write(0xBFFF, 0x20 + bank)
+    for bank in (2, 0, 3, 1):
+        bus.write(0x4000, bank)
+        assert bus.read_pages[0xA0] is not None
+        assert bus.read(0xA000) == 0x10 + bank
+        assert bus.read(0xBFFF) == 0x20 + bank
+
+
+@pytest.mark.parametrize('address, length', [
+    (0x7FF0, 0x20), (0x9FF0, 0x20), (0xDFF0, 0x20), (0xFE90, 0x100),
+    (0xFFF0, 0x20),
+], ids=['rom-vram', 'vram-cartridge-ram', 'wram-echo', 'oam-io-hram',
+        'wrap'])
+def test_read_block(make_rom, address, length):
+    rom = make_rom(b'', banks={1: bytes(range(0x100)) * 0x40})
+    motherboard = Motherboard(gamerom=rom)
+    bus = motherboard.bus
+    bus.write(0xFF40, 0x00)  # the PPU does not block VRAM and OAM
+    for offset in range(0x20):
+        bus.write(0x9FF0 + offset, offset)
+        bus.write(0xDFF0 + offset, 0x80 + offset)
+    assert bus.read_block(address, length) == bytes(
+        bus.read((address + offset) & 0xFFFF) for offset in range(length)
+    )
+
+
+def test_read_block_without_cartridge_ram(make_rom):
+    bus = Motherboard(gamerom=make_rom(b'')).bus
+    assert bus.read_block(0xA000, 0x2000) == bytes([0xFF]) * 0x2000
+
+
+def test_write_block(make_rom):
+    motherboard = Motherboard(gamerom=make_rom(b''))
+    bus = motherboard.bus
+    bus.write(0xFF40, 0x00)
+    data = bytes(range(0x20))
+    # the writes to the ROM and to the echo RAM are dropped
+    bus.write_block(0x7FF0, data)
+    assert bus.read_block(0x7FF0, 0x20) == bytes(0x10) + data[0x10:]
+    bus.write_block(0xDFF0, data)
+    assert bus.read_block(0xDFF0, 0x20) == data[:0x10] + bytes(0x10)
+    bus.write_block(0xFE90, data)
+    assert bus.read_block(0xFE90, 0x10) == data[:0x10]
+    bus.write_block(0xFF80, data)
+    assert bus.read_block(0xFF80, 0x20) == data
@@ -0,0 +1,47 @@
+import os
+
+from gameboy.hardware import Motherboard
+
+MBC1_RAM_BATTERY = 0x03
+
+
+def test_ram_persists(make_rom):
+    rom = make_rom(b'', cart_type=MBC1_RAM_BATTERY, ram_size=0x02)
+    with Motherboard(gamerom=rom) as motherboard:
+        bus, save = motherboard.bus, motherboard.cartridge.save
+        bus.write(0x0000, 0x0A)
+        assert not save.dirty
+        bus.write(0xA000, 0x42)
+        bus.write_block(0xBFFE, bytes([0x24, 0x25]))
+        assert save.dirty
+    assert not save.thread.is_alive()
+    assert save.data.closed
+    assert motherboard.cartridge.rom.closed
+    with Motherboard(gamerom=rom) as motherboard:
+        bus = motherboard.bus
+        bus.write(0x0000, 0x0A)
+        assert bus.read(0xA000) == 0x42
+        assert bus.read_block(0xBFFE, 2) == bytes([0x24, 0x25])
+
+
+def test_missing_save_file(make_rom):
+    rom = make_rom(b'', cart_type=MBC1_RAM_BATTERY, ram_size=0x03)
+    save = os.path.splitext(rom)[0] + '.sav'
+    assert not os.path.exists(save)
+    with Motherboard(gamerom=rom):
+        pass
+    assert os.path.getsize(save) == 0x8000
+
+
+def test_short_save_file(make_rom):
+    rom = make_rom(b'', cart_type=MBC1_RAM_BATTERY, ram_size=0x02)
+    save = os.path.splitext(rom)[0] + '.sav'
+    with open(save, 'wb') as fp:
+        fp.write(bytes([0x5A]) * 0x100)
+    with Motherboard(gamerom=rom) as motherboard:
+        bus = motherboard.bus
+        bus.write(0x0000, 0x0A)
+        assert bus.read_block(0xA000, 0x200) == (
+            bytes([0x5A]) * 0x100 + bytes(0x100)
+        )
+    assert os.path.getsize(save) == 0x2000
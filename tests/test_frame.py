@@ -0,0 +1,31 @@
+from array import array
+
+import pytest
+
+from gameboy.common import UnexpectedFallThrough
+from gameboy.hardware.frame import convert
+
+# every shade of BGP, then the darkest shades of OBP0 and OBP1
+PIXELS = bytearray([0x00, 0x01, 0x02, 0x03, 0x07, 0x0B])
+
+
+@pytest.mark.parametrize('format, expected', [
+    ('argb', array('I', [
+        0xFFFFFFFF, 0xFFAAAAAA, 0xFF555555, 0xFF000000,
+        0xFF000000, 0xFF000000,
+    ])),
+    ('rgb565', array('H', [
+        0xFFFF, 0xAD55, 0x52AA, 0x0000, 0x0000, 0x0000,
+    ])),
+    ('grayscale', bytes([0xFF, 0xAA, 0x55, 0x00, 0x00, 0x00])),
+    ('raw', bytes([0x00, 0x01, 0x02, 0x03, 0x07, 0x0B])),
+])
+def test_convert(format, expected):
+    frame = convert(pixels=PIXELS, format=format)
+    assert type(frame) is type(expected)
+    assert frame == expected
+
+
+def test_convert_unknown_format():
+    with pytest.raises(UnexpectedFallThrough):
+        convert(pixels=PIXELS, format='rgb')
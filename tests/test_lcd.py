@@ -0,0 +1,38 @@
+import itertools
+
+import pytest
+
+from gameboy.hardware.lcd import LCD, InterruptSource, LCDMode
+
+
+def test_stat_write_keeps_mode_and_lyc():
+    lcd = LCD()
+    lcd.lcds_mode = LCDMode.TRANSFERRING
+    lcd.lcds_lyc = True
+    lcd.write(0xFF41, 0x28)
+    assert lcd.lcds_mode == LCDMode.TRANSFERRING
+    assert lcd.lcds_lyc is True
+    assert lcd.read(0xFF41) == 0x28 | 0x04 | 0x03
+    # the read-only bits are not written either
+    lcd.lcds_mode = LCDMode.HBLANK
+    lcd.lcds_lyc = False
+    lcd.write(0xFF41, 0x47)
+    assert lcd.read(0xFF41) == 0x40
+
+
+@pytest.mark.parametrize('sources, lyc, mode', itertools.product(
+    [0x00, InterruptSource.HBLANK | InterruptSource.LYC, 0x78],
+    [False, True],
+    list(LCDMode),
+))
+def test_lcd_status(sources, lyc, mode):
+    lcd = LCD()
+    lcd.write(0xFF41, sources)
+    lcd.lcds_lyc = lyc
+    lcd.lcds_mode = mode
+    status = lcd.lcd_status
+    assert status & 0xF8 == lcd.lcds_sources == sources
+    assert bool(status & 0x04) is lyc
+    assert LCDMode(status & 0x03) is mode
+    for source in InterruptSource:
+        assert bool(lcd.lcds_stat_int(source)) is bool(sources & source)
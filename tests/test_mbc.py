@@ -0,0 +1,40 @@
+from gameboy.hardware import Motherboard
+
+
+def test_ram_without_cartridge_ram(make_rom):
+    motherboard = Motherboard(gamerom=make_rom(b'', cart_type=0x01))
+    bus = motherboard.bus
+    bus.write(0x0000, 0x0A)
+    assert bus.read(0xA000) == 0xFF
+    assert bus.read(0xBFFF) == 0xFF
+
+
+def test_disabled_ram(make_rom):
+    motherboard = Motherboard(gamerom=make_rom(b'', cart_type=0x05))
+    bus = motherboard.bus
+    bus.write(0x0000, 0x0A)
+    bus.write(0xA000, 0x05)
+    assert bus.read(0xA000) == 0xF5
+    bus.write(0x0000, 0x00)
+    assert bus.read(0xA000) == 0xFF
+
+
+def test_rtc_latch(make_rom):
+    motherboard = Motherboard(gamerom=make_rom(b'', cart_type=0x0F))
+    bus = motherboard.bus
+    bus.write(0x0000, 0x0A)
+    bus.write(0x4000, 0x08)  # seconds
+    bus.write(0xA000, 30)
+    # the registers read the values of the last latch
+    assert bus.read(0xA000) == 0
+    bus.write(0x6000, 0x00)
+    bus.write(0x6000, 0x01)
+    assert bus.read(0xA000) == 30
+    bus.write(0xA000, 45)
+    assert bus.read(0xA000) == 30
+    # the clock does not tick, only writes change it
+    for _ in range(1000):
+        motherboard.tick()
+    bus.write(0x6000, 0x00)
+    bus.write(0x6000, 0x01)
+    assert bus.read(0xA000) == 45
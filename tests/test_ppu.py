@@ -0,0 +1,152 @@
+from array import array
+
+import pytest
+
+from gameboy.hardware import Motherboard
+from gameboy.hardware import ppu as ppu_module
+from gameboy.hardware.lcd import LCDMode
+from gameboy.hardware.motherboard import NEVER, EventSource
+from gameboy.hardware.ppu import LINES_PER_FRAME, RENDERERS, TICKS_PER_LINE
+
+
+def render(rom: str, renderer: str, registers: dict) -> bytes:
+    """Renders two frames of fixed VRAM and OAM with `renderer`."""
+    motherboard = Motherboard(gamerom=rom, renderer=renderer)
+    ppu, lcd = motherboard.ppu, motherboard.lcd
+    for address in range(0x8000, 0xA000):
+        ppu.write(address, (address * 7) & 0xFF)
+    # sprites overlap, cross the edges and use every attribute
+    for index in range(40):
+        ppu.oam[index * 4:index * 4 + 4] = array('B', [
+            16 + (index // 10) * 36 + index % 5, (index * 17) % 176,
+            index * 3, (index * 0x30) & 0xF0,
+        ])
+    for address, value in {
+        0xFF47: 0x6C, 0xFF48: 0xE4, 0xFF49: 0x1B, **registers,
+    }.items():
+        lcd.write(address, value)
+    for _ in range(2 * LINES_PER_FRAME * TICKS_PER_LINE // 4):
+        ppu.advance(4)
+    return ppu.frame('raw')
+
+
+@pytest.mark.parametrize('registers', [
+    {0xFF40: 0x93},
+    {0xFF40: 0x83, 0xFF42: 0x25, 0xFF43: 0x0B},
+    {0xFF40: 0x97, 0xFF43: 0x03},
+    {0xFF40: 0xF3, 0xFF4A: 0x30, 0xFF4B: 0x47},
+    {0xFF40: 0xE1, 0xFF42: 0x80, 0xFF4A: 0x00, 0xFF4B: 0x05},
+], ids=['sprites', 'signed-tiles', 'tall-sprites', 'window', 'no-sprites'])
+@pytest.mark.parametrize('renderer', [
+    renderer for renderer in RENDERERS if renderer != 'fifo'
+])
+def test_renderers_match_fifo(make_rom, renderer, registers):
+    if renderer == 'numpy':
+        pytest.importorskip('numpy')
+    rom = make_rom(b'')
+    assert render(rom, renderer, registers) == render(rom, 'fifo', registers)
+
+
+def test_numpy_renderer_without_numpy(make_rom, monkeypatch):
+    monkeypatch.setattr(ppu_module, 'np', None)
+    with pytest.raises(ImportError, match=r'gameboy\[numpy\]'):
+        Motherboard(gamerom=make_rom(b''), renderer='numpy')
+
+
+def test_lcd_off(make_rom):
+    motherboard = Motherboard(gamerom=make_rom(b''))
+    lcd, bus = motherboard.lcd, motherboard.bus
+    motherboard.emulate(cycles=8 * TICKS_PER_LINE // 4 + 20)
+    motherboard.sync()
+    assert lcd.ly == 8
+    bus.write(0xFF40, 0x11)
+    assert lcd.ly == 0 and bus.read(0xFF41) & 0x03 == 0
+    assert motherboard.deadlines[EventSource.PPU] == NEVER
+    # the PPU is not advanced while the LCD is off
+    motherboard.emulate(cycles=LINES_PER_FRAME * TICKS_PER_LINE // 4)
+    motherboard.sync()
+    assert lcd.ly == 0 and bus.read(0xFF41) & 0x03 == 0
+    assert motherboard.deadlines[EventSource.PPU] == NEVER
+    # switching it on starts line 0 again
+    bus.write(0xFF40, 0x91)
+    assert lcd.ly == 0 and lcd.lcds_mode == LCDMode.OAM_SCAN
+    assert motherboard.deadlines[EventSource.PPU] == motherboard.ticks + 80
+    motherboard.emulate(cycles=21)
+    motherboard.sync()
+    assert lcd.ly == 0 and lcd.lcds_mode == LCDMode.TRANSFERRING
+    motherboard.emulate(cycles=TICKS_PER_LINE // 4)
+    motherboard.sync()
+    assert lcd.ly == 1
+
+
+def sprite_line(make_rom, tiles: dict, sprites: list) -> tuple:
+    """Draws the sprites of line 0, returns the back and front buffers."""
+    motherboard = Motherboard(gamerom=make_rom(b''))
+    ppu = motherboard.ppu
+    for tile, (lo, hi) in tiles.items():
+        for row in range(8):
+            ppu.write(0x8000 + tile * 16 + row * 2, lo)
+            ppu.write(0x8000 + tile * 16 + row * 2 + 1, hi)
+    for index, sprite in enumerate(sprites):
+        ppu.oam[index * 4:index * 4 + 4] = array('B', sprite)
+    ppu.load_sprites()
+    ppu.draw_sprites()
+    return bytes(ppu.sprite_line), bytes(ppu.sprite_front_line)
+
+
+def test_sprites_per_line(make_rom):
+    # the first 10 sprites of OAM on the line are drawn, whatever their X
+    sprites = [[16, 24 + 12 * index, 1, 0] for index in range(10)]
+    back, _ = sprite_line(
+        make_rom, tiles={1: (0xFF, 0x00)},
+        sprites=[[40, 8, 1, 0], *sprites, [16, 8, 1, 0], [16, 16, 1, 0]],
+    )
+    assert back[:16] == bytes(16)
+    for index in range(10):
+        x = 16 + 12 * index
+        assert back[x:x + 12] == bytes([0x5] * 8 + [0x0] * 4)
+
+
+def test_sprite_priority(make_rom):
+    back, front = sprite_line(
+        make_rom,
+        tiles={1: (0xFF, 0x00), 2: (0x00, 0xFF), 3: (0xF0, 0xF0)},
+        sprites=[
+            [16, 8, 3, 0x00],  # left half only, over the next one
+            [16, 8, 2, 0x10],  # OBP1, under the first one (same X)
+            [16, 12, 1, 0x80],  # behind the background, under the others
+        ],
+    )
+    assert back[:16] == bytes([0x7] * 4 + [0xA] * 4 + [0x5] * 4 + [0x0] * 4)
+    assert front[:16] == bytes([0x7] * 4 + [0xA] * 4 + [0x0] * 8)
+
+
+@pytest.mark.parametrize('renderer', ['fifo', 'scanline'])
+def test_scroll_x_during_transfer(make_rom, renderer):
+    def first_line(scroll_x: int) -> bytes:
+        motherboard = Motherboard(gamerom=make_rom(b''), renderer=renderer)
+        ppu, lcd = motherboard.ppu, motherboard.lcd
+        # the tiles of the map have the colors 0, 1, 2, 3, 0, 1, ...
+        for tile in range(4):
+            lo, hi = -(tile & 1) & 0xFF, -(tile >> 1) & 0xFF
+            for row in range(8):
+                ppu.write(0x8000 + tile * 16 + row * 2, lo)
+                ppu.write(0x8000 + tile * 16 + row * 2 + 1, hi)
+        for column in range(32):
+            ppu.write(0x9800 + column, column % 4)
+        lcd.write(0xFF47, 0xE4)
+        ppu.advance(80 + 40)
+        assert lcd.lcds_mode == LCDMode.TRANSFERRING
+        lcd.write(0xFF43, scroll_x)
+        while lcd.ly == 0:
+            ppu.advance(4)
+        return ppu.frame('raw')[:160]
+
+    line = first_line(scroll_x=0)
+    scrolled = first_line(scroll_x=8)
+    if renderer == 'scanline':
+        # the line is rendered from the registers at the start of mode 3
+        assert scrolled == line
+    else:
+        assert scrolled[:32] == line[:32]
+        assert scrolled[32:] == line[40:] + line[:8]
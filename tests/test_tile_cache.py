@@ -0,0 +1,36 @@
+from array import array
+
+from gameboy.hardware import Motherboard
+from gameboy.hardware.tile_cache import TILE_COUNT, TileCache
+
+
+def test_decode():
+    vram = array('B', bytes(0x2000))
+    # the low bits come from the first byte, the high bits from the second
+    vram[0x10:0x12] = array('B', [0b01010011, 0b00110101])
+    cache = TileCache(vram=vram)
+    start = cache.row(tile=1, row=0)
+    assert bytes(cache.pixels[start:start + 8]) == bytes([
+        0, 1, 2, 3, 0, 2, 1, 3,
+    ])
+    assert not cache.dirty[1]
+
+
+def test_vram_write_marks_tile_dirty(make_rom):
+    motherboard = Motherboard(gamerom=make_rom(b''))
+    bus, cache = motherboard.bus, motherboard.ppu.tile_cache
+    for tile in range(TILE_COUNT):
+        cache.row(tile=tile, row=0)
+    assert not any(cache.dirty)
+    # switch the LCD off so that VRAM is not blocked
+    bus.write(0xFF40, 0x11)
+    bus.write(0x8000 + 0x2A * 16 + 7 * 2 + 1, 0xFF)
+    assert [tile for tile in range(TILE_COUNT) if cache.dirty[tile]] == [
+        0x2A,
+    ]
+    start = cache.row(tile=0x2A, row=7)
+    assert bytes(cache.pixels[start:start + 8]) == bytes([2] * 8)
+    assert not cache.dirty[0x2A]
+    # the tile maps are not decoded
+    bus.write(0x9800, 0xFF)
+    assert not any(cache.dirty)
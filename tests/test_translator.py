@@ -0,0 +1,168 @@
+import random
+from typing import List, Tuple
+
+import pytest
+
+from gameboy.hardware import Motherboard
+from gameboy.hardware.cpu import translator as translator_module
+from gameboy.hardware.cpu.translator import HOT_THRESHOLD, MAX_INVALIDATIONS
+
+from .conftest import run_until_halt
+
+DI, EI, HALT, NOP = 0xF3, 0xFB, 0x76, 0x00
+
+# opcodes which only touch the registers, with their operand sizes
+REGISTER_OPS = {
+    **{
+        op: 0 for op in range(0x40, 0xC0)
+        if op & 0x7 != 6 and not 0x70 <= op <= 0x77
+    },
+    **{op: 0 for op in (
+        0x00, 0x03, 0x04, 0x05, 0x07, 0x09, 0x0B, 0x0C, 0x0D, 0x0F, 0x13,
+        0x14, 0x15, 0x17, 0x19, 0x1B, 0x1C, 0x1D, 0x1F, 0x23, 0x24, 0x25,
+        0x27, 0x29, 0x2B, 0x2C, 0x2D, 0x2F, 0x37, 0x39, 0x3C, 0x3D, 0x3F,
+        0xC1, 0xC5, 0xD1, 0xD5, 0xE1, 0xE5, 0xF1, 0xF5, DI, EI,
+    )},
+    **{op: 1 for op in (
+        0x06, 0x0E, 0x16, 0x1E, 0x26, 0x2E, 0x3E, 0xC6, 0xCE, 0xD6, 0xDE,
+        0xE6, 0xEE, 0xF6, 0xFE, 0xF8,
+    )},
+    **{op: 2 for op in (0x01, 0x11, 0x21)},
+}
+# opcodes which access the memory at (HL), (BC) or (DE)
+HL_OPS = [
+    *(op for op in range(0x40, 0xC0) if op & 0x7 == 6 and op != HALT),
+    *range(0x70, 0x76), 0x77, 0x22, 0x2A, 0x32, 0x3A, 0x34, 0x35,
+]
+BC_OPS, DE_OPS = [0x02, 0x0A], [0x12, 0x1A]
+
+
+def random_code(rng: random.Random, length: int) -> bytes:
+    """
+    Straight-line code which only accesses the WRAM: the high byte of the
+    pointer is loaded before each access through a register pair.
+    """
+    code: List[int] = [0x31, 0x00, 0xD0]  # LD SP,0xD000
+    for _ in range(length):
+        kind = rng.randrange(8)
+        if kind == 0:
+            code += [0x26, 0xC1, rng.choice(HL_OPS)]  # LD H,0xC1
+        elif kind == 1:
+            code += [0x06, 0xC2, rng.choice(BC_OPS)]  # LD B,0xC2
+        elif kind == 2:
+            code += [0x16, 0xC3, rng.choice(DE_OPS)]  # LD D,0xC3
+        elif kind == 3:
+            cb = rng.randrange(0x100)
+            if cb & 0x7 == 6:
+                code += [0x26, 0xC1]  # LD H,0xC1
+            code += [0xCB, cb]
+        elif kind == 4:
+            # LD (a16),A, LD A,(a16) or LD (a16),SP
+            op = rng.choice([0xEA, 0xFA, 0x08])
+            code += [op, rng.randrange(0x100), 0xC4]
+        else:
+            op = rng.choice(list(REGISTER_OPS))
+            code += [op, *(
+                rng.randrange(0x100) for _ in range(REGISTER_OPS[op])
+            )]
+    return bytes([*code, HALT])
+
+
+@pytest.fixture(autouse=True)
+def translate_at_once(monkeypatch):
+    """Translates the blocks the first time they start."""
+    monkeypatch.setattr(translator_module, 'HOT_THRESHOLD', 1)
+
+
+def run(rom: str, translate: bool) -> Tuple:
+    """Runs `rom` until HALT, returns the registers, IME and the WRAM."""
+    motherboard = Motherboard(gamerom=rom, translate=translate)
+    run_until_halt(motherboard)
+    cpu = motherboard.cpu
+    return (
+        cpu.reg_a, cpu.reg_f, cpu.reg_b, cpu.reg_c, cpu.reg_d, cpu.reg_e,
+        cpu.reg_h, cpu.reg_l, cpu.sp, cpu.pc, cpu.int_master_enabled,
+        motherboard.bus.read_block(0xC000, 0x2000),
+    )
+
+
+@pytest.mark.parametrize('code, ime', [
+    (bytes([EI, NOP, DI, HALT]), False),
+    (bytes([EI, DI, HALT]), False),
+    (bytes([EI, NOP, HALT]), True),
+], ids=['ei-nop-di', 'ei-di', 'ei-nop'])
+def test_ei_then_di(make_rom, code, ime):
+    rom = make_rom(code)
+    interpreted = run(rom, translate=False)
+    assert interpreted[10] is ime
+    assert run(rom, translate=True) == interpreted
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_random_code(make_rom, seed):
+    rom = make_rom(random_code(random.Random(seed), length=200))
+    assert run(rom, translate=True) == run(rom, translate=False)
+
+
+@pytest.mark.parametrize('load, store', [
+    (0x21, 0x77), (0x01, 0x02), (0x11, 0x12),
+], ids=['hl', 'bc', 'de'])
+def test_bank_switch_through_register(make_rom, load, store):
+    # LD rr,0x2000; LD A,0x02; LD (rr),A; LD B,n; HALT from bank 1 and 2
+    switch = bytes([load, 0x00, 0x20, 0x3E, 0x02, store])
+    rom = make_rom(
+        bytes([0xC3, 0x00, 0x40]),  # JP 0x4000
+        cart_type=0x01, rom_size=0x01,
+        banks={
+            1: switch + bytes([0x06, 0x11, HALT]),
+            2: switch + bytes([0x06, 0x22, HALT]),
+        },
+    )
+    interpreted = run(rom, translate=False)
+    assert interpreted[2] == 0x22
+    assert run(rom, translate=True) == interpreted
+
+
+def test_fallback_is_cached(make_rom):
+    motherboard = Motherboard(gamerom=make_rom(bytes([HALT])))
+    translator = motherboard.cpu.translator
+    translator.invalidations[0xC0] = MAX_INVALIDATIONS + 1
+    for pc in (0x8000, 0xC000):
+        assert translator.translate(pc=pc, key=pc) is translator.fallback
+        assert translator.blocks[pc] is translator.fallback
+
+
+def test_hot_threshold(make_rom, monkeypatch):
+    monkeypatch.setattr(translator_module, 'HOT_THRESHOLD', HOT_THRESHOLD)
+    motherboard = Motherboard(gamerom=make_rom(bytes([HALT])))
+    translator = motherboard.cpu.translator
+    for _ in range(HOT_THRESHOLD - 1):
+        assert translator.translate(pc=0x0150, key=0x0150) is (
+            translator.fallback
+        )
+    assert 0x0150 not in translator.blocks
+    block = translator.translate(pc=0x0150, key=0x0150)
+    assert block is not translator.fallback
+    assert translator.blocks[0x0150] is block
+
+
+def test_idle_loop(make_rom):
+    # LDH A,(0x44); CP 0x90; JR NZ,-6; HALT: waits for the VBlank line
+    rom = make_rom(bytes([0xF0, 0x44, 0xFE, 0x90, 0x20, 0xFA, HALT]))
+    states, iterations = [], []
+    for skip_idle in (True, False):
+        motherboard = Motherboard(gamerom=rom, skip_idle=skip_idle)
+        count = 0
+        while not motherboard.cpu.halted and count < 100000:
+            motherboard.tick()
+            count += 1
+        cpu = motherboard.cpu
+        states.append((
+            cpu.reg_a, cpu.reg_f, cpu.pc, cpu.halted, motherboard.ticks,
+            motherboard.lcd.ly,
+        ))
+        iterations.append(count)
+        assert (cpu.translator.skipped_cycles > 0) is skip_idle
+    assert states[0] == states[1]
+    assert states[0][3] is True and states[0][5] == 0x90
+    assert iterations[0] < iterations[1]